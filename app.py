@@ -2,8 +2,13 @@ import streamlit as st
 import os
 import json
 from flashcard_generator import FlashcardGenerator
-from file_processor import FileProcessor
+from ingestion_pipeline import IngestionPipeline
 from exporter import FlashcardExporter
+from generation_profiles import GENERATION_PROFILES, DEFAULT_PROFILE
+from deck_store import DeckStore
+from job_queue import JobQueue, WorkQueue
+from nlp_resources import SUPPORTED_LANGUAGES
+from utils import BatchValidator, TextAnalyzer
 import pandas as pd
 
 # Page configuration
@@ -14,11 +19,83 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_generator() -> FlashcardGenerator:
+    """Load the model once per server so all sessions share one batching scheduler"""
+    rss_watermark = os.environ.get("FLASHCARD_RSS_WATERMARK_MB")
+    return FlashcardGenerator(
+        idle_timeout_s=float(os.environ.get("FLASHCARD_MODEL_IDLE_TIMEOUT_S", 1800)),
+        rss_watermark_mb=float(rss_watermark) if rss_watermark else None,
+        artifact_dir=os.environ.get("FLASHCARD_ARTIFACT_DIR")
+    )
+
+@st.cache_resource
+def get_deck_store() -> DeckStore:
+    """One SQLite-backed deck store shared by all sessions"""
+    return DeckStore(os.environ.get("FLASHCARD_DB_PATH", "flashcards.db"))
+
+# In worker mode the app only queues jobs and reads results; worker.py processes run the model
+WORKER_MODE = os.environ.get("FLASHCARD_WORKER_MODE", "").lower() in ("1", "true", "yes")
+
+@st.cache_resource
+def get_job_queue() -> WorkQueue:
+    """Durable job queue in the same database as the decks"""
+    return JobQueue(os.environ.get("FLASHCARD_DB_PATH", "flashcards.db"))
+
+CARD_PAGE_SIZES = [25, 50, 100, 200]
+EDITOR_COLUMNS = ['id', 'question', 'answer', 'difficulty', 'topic', 'delete']
+EDITABLE_FIELDS = ['question', 'answer', 'difficulty', 'topic']
+# Cleared cells come back as None; these may not be left empty
+REQUIRED_FIELDS = ['question', 'answer', 'difficulty']
+PREVIEW_LIMIT = 100
+
+def apply_card_edits(store: DeckStore, original_df: pd.DataFrame, edited_df: pd.DataFrame):
+    """Apply one page of editor changes by card id, returning (updated, deleted) counts"""
+    deleted_ids = [int(card_id) for card_id in edited_df.loc[edited_df['delete'], 'id']]
+    
+    # Compare whole columns at once; only changed rows are written back
+    changed = (edited_df[EDITABLE_FIELDS] != original_df[EDITABLE_FIELDS]).any(axis=1)
+    rows = edited_df[changed & ~edited_df['delete']]
+    
+    # Reject the whole batch before writing anything, so a page is never half-applied
+    required = rows[REQUIRED_FIELDS].fillna('').astype(str).apply(lambda column: column.str.strip())
+    empty = rows.loc[(required == '').any(axis=1), 'id']
+    if not empty.empty:
+        raise ValueError(
+            "Question, answer and difficulty cannot be empty (cards "
+            f"{', '.join(str(int(card_id)) for card_id in empty)})"
+        )
+    
+    updates = [
+        {'id': int(row['id']), **{field: row[field] for field in EDITABLE_FIELDS}}
+        for row in rows.assign(topic=rows['topic'].fillna('').replace('', 'General')).to_dict('records')
+    ]
+    
+    updated = store.update_cards(updates) if updates else 0
+    deleted = store.delete_cards(deleted_ids) if deleted_ids else 0
+    
+    # Re-validate only the cards touched by this batch
+    if st.session_state.validated_deck_id is not None:
+        st.session_state.validator.update(updates, deleted_ids)
+    return updated, deleted
+
+def get_validation(store: DeckStore, deck_id: int):
+    """Validation summary for the deck, fully validating only when the deck changes"""
+    if st.session_state.validated_deck_id != deck_id:
+        st.session_state.validator.validate(store.iter_cards(deck_id))
+        st.session_state.validated_deck_id = deck_id
+    return st.session_state.validator.result()
+
 # Initialize session state
-if 'flashcards' not in st.session_state:
-    st.session_state.flashcards = []
-if 'generator' not in st.session_state:
-    st.session_state.generator = FlashcardGenerator()
+if 'deck_id' not in st.session_state:
+    st.session_state.deck_id = None
+if 'validator' not in st.session_state:
+    st.session_state.validator = BatchValidator()
+    st.session_state.validated_deck_id = None
+if 'job_ids' not in st.session_state:
+    st.session_state.job_ids = []
+if 'generator' not in st.session_state and not WORKER_MODE:
+    st.session_state.generator = get_generator()
 
 def main():
     st.title("🧠 LLM-Powered Flashcard Generator")
@@ -42,9 +119,50 @@ def main():
     num_flashcards = st.sidebar.slider("🔢 Number of Flashcards", 10, 25, 15)
     
     # Language selection
-    languages = ["English", "Spanish", "French", "German", "Italian"]
+    languages = list(SUPPORTED_LANGUAGES)
     selected_language = st.sidebar.selectbox("🌐 Output Language", languages)
     
+    # Generation profile
+    profiles = list(GENERATION_PROFILES)
+    selected_profile = st.sidebar.selectbox(
+        "⚡ Generation Profile",
+        profiles,
+        index=profiles.index(DEFAULT_PROFILE),
+        help="fast and balanced decode greedily with a short token budget; quality samples with a larger budget"
+    )
+    
+    # Generation mode
+    generation_modes = {
+        "auto": "Auto (AI model, rules if unavailable)",
+        "llm": "AI model only",
+        "rules": "Rule-based (fast, no model)"
+    }
+    selected_mode = st.sidebar.selectbox(
+        "🛠️ Generation Mode",
+        list(generation_modes),
+        format_func=generation_modes.get
+    )
+    
+    # Saved decks persist across restarts
+    store = get_deck_store()
+    decks = store.list_decks()
+    if decks:
+        deck_ids = [deck['id'] for deck in decks]
+        deck_labels = {deck['id']: f"{deck['name']} ({deck['card_count']} cards)" for deck in decks}
+        if st.session_state.deck_id not in deck_ids:
+            st.session_state.deck_id = deck_ids[0]
+        st.session_state.deck_id = st.sidebar.selectbox(
+            "🗂️ Deck",
+            deck_ids,
+            index=deck_ids.index(st.session_state.deck_id),
+            format_func=deck_labels.get
+        )
+    else:
+        st.session_state.deck_id = None
+    
+    deck_id = st.session_state.deck_id
+    total_cards = store.count_cards(deck_id) if deck_id is not None else 0
+    
     # Main content area
     tab1, tab2, tab3 = st.tabs(["📝 Input Content", "🃏 Generated Flashcards", "📤 Export"])
     
@@ -71,118 +189,192 @@ def main():
             )
             
             if uploaded_file is not None:
-                file_processor = FileProcessor()
-                try:
-                    content = file_processor.process_file(uploaded_file)
-                    st.success(f"✅ File processed successfully! Content length: {len(content)} characters")
-                    
-                    # Show preview
-                    with st.expander("📖 Content Preview"):
-                        st.text(content[:1000] + "..." if len(content) > 1000 else content)
-                        
-                except Exception as e:
-                    st.error(f"❌ Error processing file: {str(e)}")
+                st.info(f"📄 {uploaded_file.name} is extracted page by page while flashcards are generated")
         
         # Generate flashcards button
-        if st.button("🚀 Generate Flashcards", type="primary", disabled=not content.strip()):
-            if content.strip():
+        ready = bool(content.strip()) if input_method == "Direct Text Input" else uploaded_file is not None
+        if st.button("🚀 Generate Flashcards", type="primary", disabled=not ready):
+            if WORKER_MODE:
+                # Queue the document; a worker generates the deck in the background
+                if input_method == "Direct Text Input":
+                    document, file_type = content.encode('utf-8'), "text/plain"
+                else:
+                    document, file_type = uploaded_file.getvalue(), uploaded_file.type
+                job_id = get_job_queue().submit(document, file_type, {
+                    'subject': selected_subject,
+                    'difficulty': selected_difficulty,
+                    'num_cards': num_flashcards,
+                    'language': selected_language,
+                    'profile': selected_profile,
+                    'mode': selected_mode,
+                    'deck_name': f"{selected_subject} - {pd.Timestamp.now():%Y-%m-%d %H:%M}"
+                })
+                st.session_state.job_ids.append(job_id)
+                st.success(f"📨 Job {job_id} queued. The deck appears in the sidebar when it is done.")
+            else:
                 with st.spinner("🤖 AI is generating your flashcards... This may take a few minutes."):
                     try:
-                        flashcards = st.session_state.generator.generate_flashcards(
-                            content=content,
-                            subject=selected_subject,
-                            difficulty=selected_difficulty,
-                            num_cards=num_flashcards,
-                            language=selected_language
-                        )
+                        if input_method == "Direct Text Input":
+                            flashcards = st.session_state.generator.generate_flashcards(
+                                content=content,
+                                subject=selected_subject,
+                                difficulty=selected_difficulty,
+                                num_cards=num_flashcards,
+                                language=selected_language,
+                                profile=selected_profile,
+                                mode=selected_mode
+                            )
+                        else:
+                            # Extraction, cleaning, chunking and generation overlap
+                            pipeline = IngestionPipeline(st.session_state.generator)
+                            flashcards = pipeline.run(
+                                uploaded_file,
+                                subject=selected_subject,
+                                difficulty=selected_difficulty,
+                                num_cards=num_flashcards,
+                                language=selected_language,
+                                profile=selected_profile,
+                                mode=selected_mode
+                            )
+                            content = pipeline.content
+                            if pipeline.content_complete:
+                                st.success(f"✅ File processed successfully! Content length: {len(content)} characters")
+                            else:
+                                # Extraction stopped once enough cards were generated
+                                st.success(f"✅ Enough flashcards after reading part of the file "
+                                           f"({len(content)} characters extracted)")
+                            
+                            # Show preview
+                            partial = "" if pipeline.content_complete else " (extracted part only)"
+                            with st.expander(f"📖 Content Preview{partial}"):
+                                st.text(content[:1000] + "..." if len(content) > 1000 else content)
+                                analysis = TextAnalyzer(language=selected_language, num_keywords=5).analyze(content)
+                                st.caption(f"{analysis['word_count']} words{partial}, {analysis['sentence_count']} sentences, "
+                                           f"readability {analysis['readability']:.0f}/100. "
+                                           f"Keywords: {', '.join(analysis['keywords'])}")
+                            
+                            with st.expander("⏱️ Pipeline stages"):
+                                stats = pipeline.get_stats()
+                                st.dataframe(pd.DataFrame.from_dict(stats['stages'], orient='index'))
+                                st.caption(f"First card after {stats['first_card_s']}s, total {stats['total_s']}s")
+                                cleaning = stats['cleaning']
+                                st.caption(f"Cleaning removed {cleaning['chars_removed']} characters and "
+                                           f"{cleaning['tokens_removed']} tokens "
+                                           f"({cleaning['header_footer_lines']} header/footer lines, "
+                                           f"{cleaning['page_number_lines']} page numbers)")
                         
-                        st.session_state.flashcards = flashcards
+                        deck_id = store.create_deck(
+                            f"{selected_subject} - {pd.Timestamp.now():%Y-%m-%d %H:%M}"
+                        )
+                        total_cards = store.add_cards(deck_id, flashcards)
+                        st.session_state.deck_id = deck_id
                         st.success(f"✅ Generated {len(flashcards)} flashcards successfully!")
                         st.balloons()
-                        
+                    
                     except Exception as e:
                         st.error(f"❌ Error generating flashcards: {str(e)}")
                         st.info("💡 Try with shorter content or check your internet connection for model download.")
+
+        # Progress of the jobs this session submitted
+        if WORKER_MODE and st.session_state.job_ids:
+            st.subheader("📬 Submitted Jobs")
+            st.button("🔄 Refresh")
+            for job in get_job_queue().list_jobs(list(reversed(st.session_state.job_ids))):
+                st.write(f"**Job {job['id']}** ({job['params']['subject']}, {job['params']['num_cards']} cards): "
+                         f"{job['status']}")
+                if job['status'] == "running" and job['num_tasks']:
+                    st.progress(job['finished_tasks'] / job['num_tasks'])
+                elif job['status'] == "done":
+                    if st.button("Open deck", key=f"open_job_{job['id']}"):
+                        st.session_state.deck_id = job['deck_id']
+                        st.experimental_rerun()
+                elif job['status'] == "failed":
+                    st.error(f"❌ {job['error']}")
     
     with tab2:
         st.header("Generated Flashcards")
         
-        if st.session_state.flashcards:
-            st.success(f"📊 Total Flashcards: {len(st.session_state.flashcards)}")
+        if total_cards:
+            st.success(f"📊 Total Flashcards: {total_cards}")
+            
+            # Quality check
+            validation = get_validation(store, deck_id)
+            invalid_cards = validation['total_cards'] - validation['valid_cards']
+            if invalid_cards or validation['warnings']:
+                with st.expander(f"⚠️ {invalid_cards} cards need attention"):
+                    for warning in validation['warnings']:
+                        st.warning(warning)
+                    for error in validation['errors'][:50]:
+                        st.caption(error)
             
             # Group by topic if available
-            topics = list(set([card.get('topic', 'General') for card in st.session_state.flashcards]))
+            topics = store.list_topics(deck_id)
             
+            selected_topic = None
+            filtered_count = total_cards
             if len(topics) > 1:
-                selected_topic = st.selectbox("Filter by Topic:", ["All"] + topics)
+                topic_choice = st.selectbox("Filter by Topic:", ["All"] + topics)
                 
-                if selected_topic != "All":
-                    filtered_cards = [card for card in st.session_state.flashcards 
-                                    if card.get('topic', 'General') == selected_topic]
-                else:
-                    filtered_cards = st.session_state.flashcards
-            else:
-                filtered_cards = st.session_state.flashcards
+                if topic_choice != "All":
+                    selected_topic = topic_choice
+                    filtered_count = store.count_cards(deck_id, topic=selected_topic)
             
-            # Display flashcards
-            for i, card in enumerate(filtered_cards, 1):
-                with st.expander(f"🃏 Flashcard {i}: {card['question'][:50]}..."):
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("**❓ Question:**")
-                        st.write(card['question'])
-                        
-                        # Edit question
-                        new_question = st.text_area(
-                            "Edit question:",
-                            value=card['question'],
-                            key=f"q_edit_{i}",
-                            height=100
-                        )
-                        
-                        if new_question != card['question']:
-                            if st.button(f"Update Question {i}", key=f"update_q_{i}"):
-                                card['question'] = new_question
-                                st.success("Question updated!")
-                                st.experimental_rerun()
-                    
-                    with col2:
-                        st.markdown("**✅ Answer:**")
-                        st.write(card['answer'])
-                        
-                        # Edit answer
-                        new_answer = st.text_area(
-                            "Edit answer:",
-                            value=card['answer'],
-                            key=f"a_edit_{i}",
-                            height=100
-                        )
-                        
-                        if new_answer != card['answer']:
-                            if st.button(f"Update Answer {i}", key=f"update_a_{i}"):
-                                card['answer'] = new_answer
-                                st.success("Answer updated!")
-                                st.experimental_rerun()
-                    
-                    # Additional info
-                    col3, col4, col5 = st.columns(3)
-                    with col3:
-                        st.caption(f"📚 Topic: {card.get('topic', 'General')}")
-                    with col4:
-                        st.caption(f"📊 Difficulty: {card.get('difficulty', 'Medium')}")
-                    with col5:
-                        if st.button(f"🗑️ Delete", key=f"delete_{i}"):
-                            st.session_state.flashcards.remove(card)
-                            st.success("Flashcard deleted!")
+            # Paginated batch editor: only the visible page is loaded and rendered
+            page_size = st.selectbox("Cards per page:", CARD_PAGE_SIZES, index=1)
+            num_pages = max(1, (filtered_count + page_size - 1) // page_size)
+            page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, step=1)
+            start = (page - 1) * page_size
+            page_cards = store.get_cards(deck_id, topic=selected_topic, limit=page_size, offset=start)
+            st.caption(f"Showing cards {start + 1}-{start + len(page_cards)} of {filtered_count}")
+            
+            page_df = pd.DataFrame([
+                {
+                    'id': card['id'],
+                    'question': card['question'],
+                    'answer': card['answer'],
+                    'difficulty': card.get('difficulty', 'Medium'),
+                    'topic': card.get('topic', 'General'),
+                    'delete': False
+                }
+                for card in page_cards
+            ], columns=EDITOR_COLUMNS)
+            
+            with st.form(f"card_editor_{page}_{page_size}"):
+                edited_df = st.data_editor(
+                    page_df,
+                    hide_index=True,
+                    use_container_width=True,
+                    disabled=['id'],
+                    column_config={
+                        'id': st.column_config.NumberColumn("ID", width="small"),
+                        'question': st.column_config.TextColumn("❓ Question", width="large", required=True),
+                        'answer': st.column_config.TextColumn("✅ Answer", width="large", required=True),
+                        'difficulty': st.column_config.SelectboxColumn(
+                            "📊 Difficulty", options=["Easy", "Medium", "Hard"], required=True
+                        ),
+                        'topic': st.column_config.TextColumn("📚 Topic"),
+                        'delete': st.column_config.CheckboxColumn("🗑️ Delete")
+                    }
+                )
+                
+                if st.form_submit_button("💾 Apply changes"):
+                    try:
+                        updated, deleted = apply_card_edits(store, page_df, edited_df)
+                    except ValueError as e:
+                        st.error(f"❌ {str(e)}")
+                    else:
+                        if updated or deleted:
+                            st.success(f"Updated {updated} and deleted {deleted} flashcards!")
                             st.experimental_rerun()
+                        else:
+                            st.info("No changes to apply.")
         else:
             st.info("👆 Generate some flashcards first using the Input Content tab!")
     
     with tab3:
         st.header("Export Your Flashcards")
         
-        if st.session_state.flashcards:
+        if total_cards:
             exporter = FlashcardExporter()
             
             st.subheader("📤 Choose Export Format")
@@ -192,7 +384,7 @@ def main():
             # Export to JSON
             with col1:
                 if st.button("📄 Export to JSON"):
-                    json_data = exporter.to_json(st.session_state.flashcards)
+                    json_data = exporter.to_json(store.iter_cards(deck_id), total_cards=total_cards)
                     st.download_button(
                         label="⬇️ Download JSON",
                         data=json_data,
@@ -203,7 +395,7 @@ def main():
             # Export to CSV
             with col2:
                 if st.button("📊 Export to CSV"):
-                    csv_data = exporter.to_csv(st.session_state.flashcards)
+                    csv_data = exporter.to_csv(store.iter_cards(deck_id))
                     st.download_button(
                         label="⬇️ Download CSV",
                         data=csv_data,
@@ -214,7 +406,7 @@ def main():
             # Export to Anki format
             with col3:
                 if st.button("🧠 Export to Anki"):
-                    anki_data = exporter.to_anki(st.session_state.flashcards)
+                    anki_data = exporter.to_anki(store.iter_cards(deck_id))
                     st.download_button(
                         label="⬇️ Download Anki",
                         data=anki_data,
@@ -225,7 +417,7 @@ def main():
             # Export to Quizlet format
             with col4:
                 if st.button("📚 Export to Quizlet"):
-                    quizlet_data = exporter.to_quizlet(st.session_state.flashcards)
+                    quizlet_data = exporter.to_quizlet(store.iter_cards(deck_id))
                     st.download_button(
                         label="⬇️ Download Quizlet",
                         data=quizlet_data,
@@ -237,19 +429,45 @@ def main():
             st.subheader("👀 Export Preview")
             format_choice = st.selectbox("Select format to preview:", ["JSON", "CSV", "Anki", "Quizlet"])
             
+            # Large decks are previewed from their first cards only
+            preview_cards = store.get_cards(deck_id, limit=PREVIEW_LIMIT)
+            if total_cards > PREVIEW_LIMIT:
+                st.caption(f"Previewing the first {PREVIEW_LIMIT} of {total_cards} cards")
+            
             if format_choice == "JSON":
-                st.code(exporter.to_json(st.session_state.flashcards), language="json")
+                st.code(exporter.to_json(preview_cards), language="json")
             elif format_choice == "CSV":
-                df = pd.DataFrame(st.session_state.flashcards)
+                df = pd.DataFrame(preview_cards)
                 st.dataframe(df)
             elif format_choice == "Anki":
-                st.text(exporter.to_anki(st.session_state.flashcards))
+                st.text(exporter.to_anki(preview_cards))
             elif format_choice == "Quizlet":
-                st.text(exporter.to_quizlet(st.session_state.flashcards))
+                st.text(exporter.to_quizlet(preview_cards))
                 
         else:
             st.info("👆 Generate some flashcards first to enable export options!")
     
+    if WORKER_MODE:
+        with st.sidebar.expander("📬 Job queue"):
+            queue_stats = get_job_queue().get_stats()
+            st.caption("Jobs: " + ", ".join(f"{status} {count}" for status, count in queue_stats['jobs'].items() if count))
+            st.caption("Chunks: " + ", ".join(f"{status} {count}" for status, count in queue_stats['tasks'].items() if count))
+    else:
+        # Share of cards served by each model of the cascade
+        tier_stats = st.session_state.generator.get_tier_stats()
+        if tier_stats['total_cards']:
+            with st.sidebar.expander("📈 Model usage"):
+                for name, stats in tier_stats['tiers'].items():
+                    st.caption(f"{name}: {stats['cards']} cards ({stats['share']:.0%})")
+                st.caption(f"Escalations: {tier_stats['escalations']}")
+                
+                status = st.session_state.generator.lifecycle.get_status()
+                st.caption(f"Loaded: {', '.join(status['loaded_models']) or 'none'} | RSS: {status['rss_mb']:.0f} MB")
+                
+                startup = st.session_state.generator.get_startup_report()
+                if startup['ready_after_start_s'] is not None:
+                    st.caption(f"First model ready {startup['ready_after_start_s']:.1f}s after process start")
+    
     # Footer
     st.markdown("---")
     st.markdown("🤖 Powered by Hugging Face Transformers | Built with Streamlit")
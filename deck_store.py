@@ -0,0 +1,181 @@
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+CARD_FIELDS = ['question', 'answer', 'difficulty', 'topic', 'subject', 'language']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    deck_id INTEGER NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    difficulty TEXT NOT NULL DEFAULT 'Medium',
+    topic TEXT NOT NULL DEFAULT 'General',
+    subject TEXT NOT NULL DEFAULT 'General',
+    language TEXT NOT NULL DEFAULT 'English'
+);
+
+CREATE INDEX IF NOT EXISTS idx_cards_deck_position ON cards(deck_id, position);
+CREATE INDEX IF NOT EXISTS idx_cards_deck_topic ON cards(deck_id, topic, position);
+CREATE INDEX IF NOT EXISTS idx_cards_deck_difficulty ON cards(deck_id, difficulty);
+CREATE INDEX IF NOT EXISTS idx_cards_deck_subject ON cards(deck_id, subject);
+"""
+
+
+class DeckStore:
+    """Persistent flashcard decks backed by SQLite.
+
+    Every thread gets its own connection (Streamlit serves each session from
+    a separate thread); WAL mode lets readers run while another session writes.
+    """
+
+    def __init__(self, db_path: str = "flashcards.db"):
+        if db_path == ":memory:":
+            # Each thread's connection would get its own empty database
+            raise ValueError("DeckStore needs a database file; ':memory:' is private to one connection")
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _card_filter(deck_id: int, topic: Optional[str], difficulty: Optional[str],
+                     subject: Optional[str]):
+        """WHERE clause and parameters for the indexed card filters"""
+        clauses = ["deck_id = ?"]
+        params = [deck_id]
+        for column, value in (('topic', topic), ('difficulty', difficulty), ('subject', subject)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return " AND ".join(clauses), params
+
+    def create_deck(self, name: str) -> int:
+        """Create an empty deck and return its id"""
+        with self._connection() as conn:
+            return self.insert_deck(conn, name)
+
+    @staticmethod
+    def insert_deck(conn: sqlite3.Connection, name: str) -> int:
+        """Insert a deck row in the caller's transaction, e.g. one that also records it elsewhere"""
+        cursor = conn.execute("INSERT INTO decks (name, created_at) VALUES (?, ?)", (name, time.time()))
+        return cursor.lastrowid
+
+    def list_decks(self) -> List[Dict[str, Any]]:
+        """All decks with their card counts, newest first"""
+        rows = self._connection().execute(
+            """SELECT d.id, d.name, d.created_at, COUNT(c.id) AS card_count
+               FROM decks d LEFT JOIN cards c ON c.deck_id = d.id
+               GROUP BY d.id ORDER BY d.created_at DESC"""
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete_deck(self, deck_id: int):
+        """Delete a deck and all of its cards"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
+
+    def add_cards(self, deck_id: int, flashcards: Iterable[Dict[str, Any]]) -> int:
+        """Bulk insert cards at the end of a deck in one transaction"""
+        conn = self._connection()
+        with conn:
+            next_position = conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM cards WHERE deck_id = ?", (deck_id,)
+            ).fetchone()[0]
+            rows = (
+                (deck_id, next_position + i, card['question'], card['answer'],
+                 card.get('difficulty', 'Medium'), card.get('topic', 'General'),
+                 card.get('subject', 'General'), card.get('language', 'English'))
+                for i, card in enumerate(flashcards)
+            )
+            cursor = conn.executemany(
+                """INSERT INTO cards (deck_id, position, question, answer, difficulty, topic, subject, language)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            return cursor.rowcount
+
+    def count_cards(self, deck_id: int, topic: Optional[str] = None, difficulty: Optional[str] = None,
+                    subject: Optional[str] = None) -> int:
+        """Number of cards in a deck matching the optional filters"""
+        where, params = self._card_filter(deck_id, topic, difficulty, subject)
+        return self._connection().execute(f"SELECT COUNT(*) FROM cards WHERE {where}", params).fetchone()[0]
+
+    def list_topics(self, deck_id: int) -> List[str]:
+        """Distinct topics of a deck, read from the topic index"""
+        rows = self._connection().execute(
+            "SELECT DISTINCT topic FROM cards WHERE deck_id = ? ORDER BY topic", (deck_id,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_cards(self, deck_id: int, topic: Optional[str] = None, difficulty: Optional[str] = None,
+                  subject: Optional[str] = None, limit: Optional[int] = None,
+                  offset: int = 0) -> List[Dict[str, Any]]:
+        """One page of cards in deck order"""
+        where, params = self._card_filter(deck_id, topic, difficulty, subject)
+        query = f"SELECT id, {', '.join(CARD_FIELDS)} FROM cards WHERE {where} ORDER BY position"
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return [dict(row) for row in self._connection().execute(query, params)]
+
+    def iter_cards(self, deck_id: int, topic: Optional[str] = None, difficulty: Optional[str] = None,
+                   subject: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream cards in deck order without loading the whole deck into memory"""
+        where, params = self._card_filter(deck_id, topic, difficulty, subject)
+        # A dedicated connection keeps the read cursor independent of writes
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(
+                f"SELECT id, {', '.join(CARD_FIELDS)} FROM cards WHERE {where} ORDER BY position", params
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+
+    def update_cards(self, updates: List[Dict[str, Any]]) -> int:
+        """Bulk update cards by id; each update holds an 'id' and the fields to change"""
+        conn = self._connection()
+        updated = 0
+        with conn:
+            for update in updates:
+                fields = [field for field in CARD_FIELDS if field in update]
+                if not fields:
+                    continue
+                assignments = ", ".join(f"{field} = ?" for field in fields)
+                conn.execute(f"UPDATE cards SET {assignments} WHERE id = ?",
+                             [update[field] for field in fields] + [update['id']])
+                updated += 1
+        return updated
+
+    def delete_cards(self, card_ids: Iterable[int]) -> int:
+        """Bulk delete cards by id"""
+        conn = self._connection()
+        with conn:
+            cursor = conn.executemany("DELETE FROM cards WHERE id = ?", ((card_id,) for card_id in card_ids))
+            return cursor.rowcount
@@ -1,42 +1,84 @@
 import json
 import csv
 import io
-from typing import List, Dict, Any
-import pandas as pd
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 
 class FlashcardExporter:
     def __init__(self):
         pass
     
-    def to_json(self, flashcards: List[Dict[str, Any]]) -> str:
+    def to_json(self, flashcards: Iterable[Dict[str, Any]], total_cards: Optional[int] = None) -> str:
         """Export flashcards to JSON format"""
-        export_data = {
-            "metadata": {
-                "total_cards": len(flashcards),
-                "export_format": "json",
-                "version": "1.0"
-            },
-            "flashcards": flashcards
+        return ''.join(self.stream_json(flashcards, total_cards))
+    
+    def stream_json(self, flashcards: Iterable[Dict[str, Any]],
+                    total_cards: Optional[int] = None) -> Iterator[str]:
+        """Yield the JSON export piece by piece, e.g. from DeckStore.iter_cards"""
+        if total_cards is None:
+            flashcards = list(flashcards)
+            total_cards = len(flashcards)
+        
+        metadata = {
+            "total_cards": total_cards,
+            "export_format": "json",
+            "version": "1.0"
         }
-        return json.dumps(export_data, indent=2, ensure_ascii=False)
+        metadata_json = json.dumps(metadata, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        yield '{\n  "metadata": ' + metadata_json + ',\n  "flashcards": ['
+        
+        # Same layout as json.dumps(export_data, indent=2) without building the whole list
+        separator = '\n'
+        for card in flashcards:
+            card_json = json.dumps(card, indent=2, ensure_ascii=False).replace('\n', '\n    ')
+            yield separator + '    ' + card_json
+            separator = ',\n'
+        
+        yield ('\n  ]\n}' if separator != '\n' else ']\n}')
     
-    def to_csv(self, flashcards: List[Dict[str, Any]]) -> str:
+    def to_csv(self, flashcards: Iterable[Dict[str, Any]]) -> str:
         """Export flashcards to CSV format"""
-        if not flashcards:
-            return ""
+        return ''.join(self.stream_csv(flashcards))
+    
+    def stream_csv(self, flashcards: Iterable[Dict[str, Any]], batch_size: int = 1000) -> Iterator[str]:
+        """Yield the CSV export in batches of rows"""
+        output = io.StringIO()
+        writer = None
         
-        # Convert to DataFrame
-        df = pd.DataFrame(flashcards)
+        for i, card in enumerate(flashcards, 1):
+            if writer is None:
+                # Columns come from the first card; all cards in a deck share them
+                writer = csv.DictWriter(output, fieldnames=list(card), restval='',
+                                        extrasaction='ignore', lineterminator='\n')
+                writer.writeheader()
+            writer.writerow(card)
+            
+            if i % batch_size == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
         
-        # Create CSV string
-        output = io.StringIO()
-        df.to_csv(output, index=False, encoding='utf-8')
-        return output.getvalue()
+        if output.tell():
+            yield output.getvalue()
     
-    def to_anki(self, flashcards: List[Dict[str, Any]]) -> str:
+    def to_anki(self, flashcards: Iterable[Dict[str, Any]]) -> str:
         """Export flashcards to Anki import format"""
-        anki_cards = []
+        return ''.join(self.stream_anki(flashcards))
+    
+    def stream_anki(self, flashcards: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Yield the Anki export line by line"""
+        # Add header with instructions
+        yield """# Anki Import File
+# Import Instructions:
+# 1. Open Anki
+# 2. Go to File > Import
+# 3. Select this file
+# 4. Make sure 'Fields separated by: Tab' is selected
+# 5. Map fields: Field 1 -> Front, Field 2 -> Back, Field 3 -> Tags
+# 6. Click Import
+
+"""
         
+        separator = ''
         for card in flashcards:
             # Anki format: Front\tBack\tTags
             question = card['question'].replace('\t', ' ').replace('\n', '<br>')
@@ -54,36 +96,17 @@ class FlashcardExporter:
             tag_string = ' '.join(tags)
             
             anki_line = f"{question}\t{answer}\t{tag_string}"
-            anki_cards.append(anki_line)
-        
-        # Add header with instructions
-        header = """# Anki Import File
-# Import Instructions:
-# 1. Open Anki
-# 2. Go to File > Import
-# 3. Select this file
-# 4. Make sure 'Fields separated by: Tab' is selected
-# 5. Map fields: Field 1 -> Front, Field 2 -> Back, Field 3 -> Tags
-# 6. Click Import
-
-"""
-        
-        return header + '\n'.join(anki_cards)
+            yield separator + anki_line
+            separator = '\n'
     
-    def to_quizlet(self, flashcards: List[Dict[str, Any]]) -> str:
+    def to_quizlet(self, flashcards: Iterable[Dict[str, Any]]) -> str:
         """Export flashcards to Quizlet import format"""
-        quizlet_cards = []
-        
-        for card in flashcards:
-            # Quizlet format: Term\tDefinition
-            question = card['question'].replace('\t', ' ').replace('\n', ' ')
-            answer = card['answer'].replace('\t', ' ').replace('\n', ' ')
-            
-            quizlet_line = f"{question}\t{answer}"
-            quizlet_cards.append(quizlet_line)
-        
+        return ''.join(self.stream_quizlet(flashcards))
+    
+    def stream_quizlet(self, flashcards: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Yield the Quizlet export line by line"""
         # Add header with instructions
-        header = """# Quizlet Import File
+        yield """# Quizlet Import File
 # Import Instructions:
 # 1. Go to Quizlet.com and create a new study set
 # 2. Click on "Import from Word, Excel, Google Docs, etc."
@@ -94,7 +117,15 @@ class FlashcardExporter:
 
 """
         
-        return header + '\n'.join(quizlet_cards)
+        separator = ''
+        for card in flashcards:
+            # Quizlet format: Term\tDefinition
+            question = card['question'].replace('\t', ' ').replace('\n', ' ')
+            answer = card['answer'].replace('\t', ' ').replace('\n', ' ')
+            
+            quizlet_line = f"{question}\t{answer}"
+            yield separator + quizlet_line
+            separator = '\n'
     
     def to_custom_format(self, flashcards: List[Dict[str, Any]], format_name: str) -> str:
         """Export flashcards to a custom format"""
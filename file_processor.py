@@ -1,11 +1,175 @@
 import io
+import re
+from collections import Counter
 import PyPDF2
-from typing import Optional
+from typing import Optional, Iterator, Tuple, List, Dict, Callable, Set
 import streamlit as st
+from section_index import PAGE_MARKER
+
+# Plain-text files are yielded in blocks of about this many characters so
+# downstream stages can start before the whole file has been read
+TEXT_BLOCK_SIZE = 20000
+
+# Runs of whitespace other than newlines
+_INLINE_WHITESPACE = re.compile(r'[^\S\n]+')
+# A number at the start or end of a line, where running headers print the page
+_EDGE_NUMBER = re.compile(r'^(\d+)\b|\b(\d+)$')
+# Bare page numbers such as "12", "Page 12" or "12 of 40"
+_PAGE_NUMBER = re.compile(r'^(?:page\s*)?\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?$', re.IGNORECASE)
+
+
+class ContentCleaner:
+    """Normalizes extracted text and removes running headers, footers and page numbers.
+
+    Only the first and last ``edge_lines`` lines of a page are candidates. A
+    candidate is dropped when it is a bare page number or when the same line
+    appears at the edge of at least ``min_repeats`` pages. A number at the
+    start or end of the line is ignored if it advances with the page, so
+    "Chapter 2 - page 7" on one page matches "Chapter 2 - page 8" on the
+    next, while "Chapter 1" and "Chapter 2" headings far apart stay
+    distinct. Whitespace is collapsed within lines and runs of blank lines
+    become one. Removed characters and tokens are counted.
+    """
+
+    def __init__(self, edge_lines: int = 2, min_repeats: int = 3,
+                 count_tokens: Optional[Callable[[str], int]] = None):
+        self.edge_lines = edge_lines
+        self.min_repeats = min_repeats
+        self.count_tokens = count_tokens or (lambda text: len(text.split()))
+        self.reset()
+
+    def reset(self):
+        """Forget repeated lines and statistics from earlier documents"""
+        self._edge_counts = Counter()
+        # Pages held back by feed_page until enough pages have been seen
+        self._pending: List[Tuple[Optional[int], str, List[str], Dict[int, Tuple[str, Optional[int]]]]] = []
+        self._numbered_pages = 0
+        self.stats = {
+            'chars_in': 0,
+            'chars_out': 0,
+            'chars_removed': 0,
+            'tokens_removed': 0,
+            'header_footer_lines': 0,
+            'page_number_lines': 0,
+        }
+
+    @staticmethod
+    def _key(line: str, page_number: int) -> Tuple[str, Optional[int]]:
+        """Line with its edge number replaced by the number's offset from the page"""
+        line = line.lower()
+        match = _EDGE_NUMBER.search(line)
+        if match is None:
+            return line, None
+        number = match.group(1) or match.group(2)
+        return line[:match.start()] + '#' + line[match.end():], int(number) - page_number
+
+    def _edge_indexes(self, lines: List[str]) -> List[int]:
+        content = [i for i, line in enumerate(lines) if line and not PAGE_MARKER.match(line)]
+        if len(content) <= 2 * self.edge_lines:
+            return content
+        return content[:self.edge_lines] + content[-self.edge_lines:]
+
+    def _split_pages(self, content: str) -> List[Tuple[int, List[str]]]:
+        """Normalized lines grouped by page with the page's number (0 before the first marker).
+
+        Numbers come from the markers rather than positions, since extraction
+        skips pages without text.
+        """
+        pages = [(0, [])]
+        for raw_line in content.split('\n'):
+            line = _INLINE_WHITESPACE.sub(' ', raw_line).strip()
+            marker = PAGE_MARKER.match(line)
+            if marker:
+                pages.append((int(marker.group(1)), []))
+            pages[-1][1].append(line)
+        return pages
+
+    def _emit(self, lines: List[str], drop: Set[int], output: List[str]):
+        """Append kept lines to ``output``, collapsing blank lines into one paragraph break"""
+        for i, line in enumerate(lines):
+            if i in drop:
+                if _PAGE_NUMBER.match(line):
+                    self.stats['page_number_lines'] += 1
+                else:
+                    self.stats['header_footer_lines'] += 1
+                self.stats['tokens_removed'] += self.count_tokens(line)
+            elif line:
+                output.append(line)
+            elif output and output[-1]:
+                output.append('')
+
+    def _finish(self, source: str, output: List[str]) -> str:
+        while output and not output[-1]:
+            output.pop()
+        cleaned = '\n'.join(output)
+        self.stats['chars_in'] += len(source)
+        self.stats['chars_out'] += len(cleaned)
+        self.stats['chars_removed'] = self.stats['chars_in'] - self.stats['chars_out']
+        return cleaned
+
+    def clean(self, content: str) -> str:
+        """Clean a whole document; repeated edge lines are counted over all its pages"""
+        pages = self._split_pages(content)
+        edges = [self._edge_indexes(lines) for _, lines in pages]
+
+        counts = Counter()
+        for (page_number, lines), indexes in zip(pages, edges):
+            counts.update({self._key(lines[i], page_number) for i in indexes})
+
+        output = []
+        for (page_number, lines), indexes in zip(pages, edges):
+            drop = {i for i in indexes
+                    if _PAGE_NUMBER.match(lines[i]) or counts[self._key(lines[i], page_number)] >= self.min_repeats}
+            self._emit(lines, drop, output)
+        return self._finish(content, output)
+
+    def feed_page(self, text: str, page_number: Optional[int] = None) -> List[Tuple[Optional[int], str]]:
+        """Clean pages as they stream in, returning ``(page_number, text)`` for those ready.
+
+        The first ``min_repeats`` numbered pages are held back until all of
+        them have been seen, so a header running from the first page is
+        removed everywhere. Later pages come out as they are fed; a header
+        that starts further into the document is kept until it has been seen
+        on ``min_repeats`` pages. Text without a page number has no pages and
+        only gets whitespace normalization. Call ``flush`` after the last page.
+        """
+        lines = [line for _, page in self._split_pages(text) for line in page]
+        keys = {}
+        if page_number is not None:
+            keys = {i: self._key(lines[i], page_number) for i in self._edge_indexes(lines)}
+            self._edge_counts.update(set(keys.values()))
+            self._numbered_pages += 1
+        elif not self._pending:
+            return [(None, self._clean_lines(text, lines, keys))]
+
+        self._pending.append((page_number, text, lines, keys))
+        if self._numbered_pages < self.min_repeats:
+            return []
+        return self.flush()
+
+    def flush(self) -> List[Tuple[Optional[int], str]]:
+        """Clean and return the pages still held back, e.g. at the end of a short document"""
+        ready = [(page_number, self._clean_lines(text, lines, keys))
+                 for page_number, text, lines, keys in self._pending]
+        self._pending = []
+        return ready
+
+    def _clean_lines(self, text: str, lines: List[str], keys: Dict[int, Tuple[str, Optional[int]]]) -> str:
+        # Counts already include this page and every page fed before it is emitted
+        drop = {i for i, key in keys.items()
+                if _PAGE_NUMBER.match(lines[i]) or self._edge_counts[key] >= self.min_repeats}
+        output = []
+        self._emit(lines, drop, output)
+        return self._finish(text, output)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Characters in and out, and what was removed, since the last reset"""
+        return dict(self.stats)
+
 
 class FileProcessor:
     def __init__(self):
-        pass
+        self.cleaning_stats: Dict[str, int] = {}
     
     def process_file(self, uploaded_file) -> str:
         """Process uploaded file and extract text content"""
@@ -25,6 +189,35 @@ class FileProcessor:
         except Exception as e:
             raise Exception(f"Error processing file: {str(e)}")
     
+    def iter_pages(self, uploaded_file) -> Iterator[Tuple[Optional[int], str]]:
+        """Yield ``(page_number, text)`` pieces of an uploaded file as they are extracted.
+
+        PDFs yield one item per page with text; plain text has no pages and
+        yields blocks split at paragraph boundaries with a page number of None.
+        """
+        file_type = uploaded_file.type
+        
+        if file_type == "text/plain":
+            content = self._process_txt_file(uploaded_file)
+            yield from ((None, block) for block in self._split_blocks(content))
+        elif file_type == "application/pdf":
+            yield from self._iter_pdf_pages(uploaded_file)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+    
+    @staticmethod
+    def _split_blocks(content: str, block_size: int = TEXT_BLOCK_SIZE) -> Iterator[str]:
+        start = 0
+        while start < len(content):
+            end = start + block_size
+            if end < len(content):
+                # Break after the last paragraph in the block, if there is one
+                paragraph_end = content.rfind('\n\n', start, end)
+                if paragraph_end > start:
+                    end = paragraph_end + 2
+            yield content[start:end]
+            start = end
+    
     def _process_txt_file(self, uploaded_file) -> str:
         """Process .txt file"""
         try:
@@ -42,21 +235,27 @@ class FileProcessor:
                 content = uploaded_file.read().decode('cp1252')
                 return content
     
+    def _iter_pdf_pages(self, uploaded_file) -> Iterator[Tuple[int, str]]:
+        """Yield the text of each PDF page that has any, one page at a time"""
+        pdf_reader = PyPDF2.PdfReader(uploaded_file)
+        
+        for page_num, page in enumerate(pdf_reader.pages):
+            try:
+                page_text = page.extract_text()
+            except Exception as e:
+                print(f"Warning: Could not extract text from page {page_num + 1}: {e}")
+                continue
+            if page_text:
+                yield page_num + 1, page_text
+    
     def _process_pdf_file(self, uploaded_file) -> str:
         """Process .pdf file"""
         try:
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
             content = ""
             
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        content += f"\n--- Page {page_num + 1} ---\n"
-                        content += page_text + "\n"
-                except Exception as e:
-                    print(f"Warning: Could not extract text from page {page_num + 1}: {e}")
-                    continue
+            for page_num, page_text in self._iter_pdf_pages(uploaded_file):
+                content += f"\n--- Page {page_num} ---\n"
+                content += page_text + "\n"
             
             if not content.strip():
                 raise ValueError("No text content could be extracted from the PDF")
@@ -84,17 +283,8 @@ class FileProcessor:
     
     def clean_content(self, content: str) -> str:
         """Clean and preprocess extracted content"""
-        # Remove excessive whitespace
-        content = ' '.join(content.split())
-        
-        # Remove page headers/footers patterns (common in PDFs)
-        lines = content.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            # Skip very short lines that might be page numbers or headers
-            if len(line) > 5:
-                cleaned_lines.append(line)
-        
-        return '\n'.join(cleaned_lines)
\ No newline at end of file
+        cleaner = ContentCleaner()
+        cleaned = cleaner.clean(content)
+        # Characters and tokens removed, for the last cleaned document
+        self.cleaning_stats = cleaner.get_stats()
+        return cleaned
@@ -2,126 +2,246 @@ import re
 import random
 from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
 import torch
-from typing import List, Dict, Any
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
+from typing import List, Dict, Any, Optional, Tuple
+import threading
+import time
 import warnings
+from inference_scheduler import InferenceScheduler
+from generation_profiles import GENERATION_PROFILES, DEFAULT_PROFILE, build_generation_kwargs
+from rule_based_engine import RuleBasedEngine
+from section_index import SectionIndex, body_start
+from nlp_resources import SUPPORTED_LANGUAGES, get_nlp_resources
+from model_cascade import DEFAULT_CASCADE, ModelTier, CascadeRouter
+from model_lifecycle import ModelLifecycleManager
+from model_artifacts import find_artifact, load_mmap_model, load_warmup_prompts, process_start_time
+from utils import ValidationUtils
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
+warnings.filterwarnings("ignore", category=UserWarning)
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
+# "auto" uses the LLM when it loaded and the rule-based engine otherwise
+GENERATION_MODES = ["auto", "llm", "rules"]
 
-warnings.filterwarnings("ignore", category=UserWarning)
+# Question used when a model response cannot be parsed at all
+UNPARSED_QUESTION = "What is the main concept discussed in this content?"
 
 class FlashcardGenerator:
-    def __init__(self):
-        self.model_name = "google/flan-t5-base"  # Smaller model for better performance
+    def __init__(self, max_batch_size: int = 8, batch_wait_ms: float = 50.0,
+                 preload_languages: bool = True, model_names: Optional[List[str]] = None,
+                 idle_timeout_s: Optional[float] = 1800.0, rss_watermark_mb: Optional[float] = None,
+                 artifact_dir: Optional[str] = None, warmup: bool = True,
+                 generation_timeout_s: Optional[float] = 300.0):
+        # Cascade of models, smallest first; the last one is the primary model.
+        # An empty list loads no model, for rule-based generation only
+        self.model_names = list(DEFAULT_CASCADE if model_names is None else model_names)
+        self.model_name = self.model_names[-1] if self.model_names else None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.generator = None
-        self.tokenizer = None
-        self._load_model()
+        # Models that loaded at startup; they may be evicted and reloaded later
+        self.tiers: List[str] = []
+        self.router = CascadeRouter()
+        self.lifecycle = ModelLifecycleManager(
+            self._load_model,
+            idle_timeout_s=idle_timeout_s,
+            rss_watermark_mb=rss_watermark_mb
+        )
+        # Prompts from all concurrent callers are batched through one scheduler per model
+        self.max_batch_size = max_batch_size
+        self.batch_wait_ms = batch_wait_ms
+        # A request gives up on its tier (and falls back) instead of waiting forever
+        self.generation_timeout_s = generation_timeout_s
+        # Prepared safetensors artifacts (see model_artifacts.py) load faster than the hub cache
+        self.artifact_dir = artifact_dir
+        self.warmup = warmup
+        # Load and warm-up timings per model, and when the first model became ready
+        self.load_reports: Dict[str, Dict[str, Any]] = {}
+        self.ready_after_start_s: Optional[float] = None
+        # Tokens generated per card, per profile, for tuning decode cost
+        self._stats_lock = threading.Lock()
+        self.generation_stats = {name: {'cards': 0, 'tokens': 0} for name in GENERATION_PROFILES}
+        # Punkt models and stopwords are loaded once per language and shared
+        self.nlp = get_nlp_resources()
+        if preload_languages:
+            self.nlp.preload(SUPPORTED_LANGUAGES, background=True)
+        self.rule_engine = RuleBasedEngine(nlp=self.nlp)
+        
+        for model_name in self.model_names:
+            if self.lifecycle.load(model_name):
+                self.tiers.append(model_name)
+    
+    @property
+    def model_available(self) -> bool:
+        return bool(self.tiers)
+    
+    def check_mode(self, mode: str):
+        """Reject unknown modes, and "llm" when no model loaded"""
+        if mode not in GENERATION_MODES:
+            raise ValueError(f"Unknown generation mode: {mode}")
+        if mode == "llm" and not self.model_available:
+            raise RuntimeError("LLM mode requested but the model is not loaded")
+    
+    def uses_rules(self, mode: str) -> bool:
+        """Whether ``mode`` generates with the rule-based engine"""
+        return mode == "rules" or (mode == "auto" and not self.model_available)
     
-    def _load_model(self):
-        """Load the LLM model and tokenizer"""
+    def _load_model(self, model_name: str) -> Optional[ModelTier]:
+        """Load one model of the cascade with its tokenizer and scheduler"""
         try:
-            print("Loading model... This may take a few minutes on first run.")
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            model = AutoModelForSeq2SeqLM.from_pretrained(
-                self.model_name,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                device_map="auto" if self.device == "cuda" else None
-            )
+            started = time.time()
+            artifact = find_artifact(self.artifact_dir, model_name)
+            if artifact:
+                print(f"Loading model {model_name} from {artifact}...")
+            else:
+                print(f"Loading model {model_name}... This may take a few minutes on first run.")
             
-            self.generator = pipeline(
+            tokenizer = AutoTokenizer.from_pretrained(artifact or model_name, use_fast=True)
+            if artifact and self.device == "cpu":
+                # Weights stay memory-mapped and are shared with other workers via the page cache
+                model = load_mmap_model(artifact)
+            else:
+                model = AutoModelForSeq2SeqLM.from_pretrained(
+                    artifact or model_name,
+                    torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
+                    device_map="auto" if self.device == "cuda" else None,
+                    use_safetensors=True if artifact else None
+                )
+            
+            generator = pipeline(
                 "text2text-generation",
                 model=model,
-                tokenizer=self.tokenizer,
-                device=0 if self.device == "cuda" else -1,
-                max_length=512,
-                do_sample=True,
-                temperature=0.7
+                tokenizer=tokenizer,
+                device=0 if self.device == "cuda" else -1
+            )
+            scheduler = InferenceScheduler(
+                generator,
+                tokenizer=tokenizer,
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.batch_wait_ms
             )
-            print("Model loaded successfully!")
+            # Decoding settings come from the generation profile on each call
+            tier = ModelTier(model_name, generator, tokenizer, scheduler, build_generation_kwargs(tokenizer))
+            loaded = time.time()
             
+            if self.warmup:
+                self._warm_up(tier, load_warmup_prompts(artifact))
+            ready = time.time()
+            
+            self._record_load(model_name, {
+                'source': 'artifact' if artifact else 'hub',
+                'load_s': round(loaded - started, 3),
+                'warmup_s': round(ready - loaded, 3)
+            }, ready)
+            print(f"Model {model_name} loaded successfully!")
+            return tier
+            
+        except Exception as e:
+            print(f"Error loading model {model_name}: {e}")
+            # Fallback to a rule-based approach if no model loads
+            return None
+    
+    def _warm_up(self, tier: ModelTier, prompts: List[str]):
+        """Run recorded prompts once so the first real request does not pay for lazy initialisation"""
+        if not prompts:
+            return
+        try:
+            tier.generator(prompts, batch_size=len(prompts), truncation=True, num_return_sequences=1,
+                           **tier.generation_kwargs[DEFAULT_PROFILE])
         except Exception as e:
-            print(f"Error loading model: {e}")
-            # Fallback to a rule-based approach if model loading fails
-            self.generator = None
+            print(f"Warning: Warm-up failed for {tier.name}: {e}")
+    
+    def _record_load(self, model_name: str, report: Dict[str, Any], ready: float):
+        with self._stats_lock:
+            if self.ready_after_start_s is None:
+                self.ready_after_start_s = round(ready - process_start_time(), 3)
+                print(f"First model ready {self.ready_after_start_s}s after process start")
+            self.load_reports[model_name] = report
     
-    def _chunk_text(self, text: str, max_chunk_size: int = 1000) -> List[str]:
+    def get_startup_report(self) -> Dict[str, Any]:
+        """Time from process start to the first ready model, and the latest load timings per model"""
+        with self._stats_lock:
+            return {
+                'ready_after_start_s': self.ready_after_start_s,
+                'models': {name: dict(report) for name, report in self.load_reports.items()}
+            }
+    
+    def _chunk_text(self, text: str, max_chunk_size: int = 1000, language: str = "English") -> List[str]:
         """Split text into manageable chunks"""
-        sentences = sent_tokenize(text)
+        return [chunk for _, chunk in self._chunk_text_with_offsets(text, max_chunk_size, language)]
+    
+    def _chunk_text_with_offsets(self, text: str, max_chunk_size: int = 1000, language: str = "English",
+                                 sentences: Optional[List[str]] = None) -> List[Tuple[int, str]]:
+        """Split text into chunks, each paired with its start offset in ``text``"""
+        if sentences is None:
+            sentences = self.nlp.sent_tokenize(text, language)
         chunks = []
         current_chunk = ""
+        chunk_start = 0
+        position = 0
         
         for sentence in sentences:
+            # Sentences are verbatim substrings, so their offsets can be found in order
+            found = text.find(sentence, position)
+            sentence_start = found if found >= 0 else position
+            position = sentence_start + len(sentence) if found >= 0 else position
+            
+            # Punkt joins page markers and headings onto the next sentence; the chunk's
+            # offset is placed after them so its topic is the section it opens
+            body_offset = body_start(text, sentence_start, position) if found >= 0 else sentence_start
             if len(current_chunk + sentence) < max_chunk_size:
+                if not current_chunk:
+                    chunk_start = body_offset
                 current_chunk += sentence + " "
             else:
                 if current_chunk:
-                    chunks.append(current_chunk.strip())
+                    chunks.append((chunk_start, current_chunk.strip()))
                 current_chunk = sentence + " "
+                chunk_start = body_offset
         
         if current_chunk:
-            chunks.append(current_chunk.strip())
+            chunks.append((chunk_start, current_chunk.strip()))
         
         return chunks
     
-    def _extract_key_concepts(self, text: str) -> List[str]:
+    def _extract_key_concepts(self, text: str, language: str = "English") -> List[str]:
         """Extract key concepts from text using simple NLP"""
-        try:
-            stop_words = set(stopwords.words('english'))
-        except:
-            stop_words = set()
-        
-        # Simple keyword extraction
-        words = word_tokenize(text.lower())
-        words = [word for word in words if word.isalpha() and word not in stop_words and len(word) > 3]
-        
-        # Get word frequency
-        word_freq = {}
-        for word in words:
-            word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Sort by frequency and return top concepts
-        key_concepts = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:20]
-        return [concept[0] for concept in key_concepts]
+        return self.rule_engine.extract_key_concepts(text, language)
     
-    def _detect_topics(self, text: str) -> List[str]:
-        """Detect topics from text structure"""
-        topics = []
-        
-        # Look for headings and section markers
-        lines = text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if len(line) > 0:
-                # Check for potential headings (short lines, capitalized, etc.)
-                if (len(line) < 100 and 
-                    (line.isupper() or line.istitle()) and 
-                    not line.endswith('.') and
-                    len(line.split()) <= 8):
-                    topics.append(line)
-        
-        # If no clear topics found, use key concepts
-        if not topics:
-            key_concepts = self._extract_key_concepts(text)
-            topics = key_concepts[:5]  # Use top 5 concepts as topics
-        
-        return topics[:10]  # Limit to 10 topics max
+    def _build_section_index(self, text: str) -> SectionIndex:
+        """Index headings and page markers so chunks can be mapped to their section"""
+        return SectionIndex(text)
+    
+    def _assign_topic(self, sections: SectionIndex, offset: Optional[int],
+                      fallback_topics: List[str], index: int) -> str:
+        """Topic of the section enclosing ``offset``, else a key concept"""
+        if offset is not None:
+            topic = sections.topic_at(offset)
+            if topic:
+                return topic
+        return fallback_topics[index % len(fallback_topics)] if fallback_topics else "General"
     
-    def _generate_question_answer_with_llm(self, text: str, subject: str, difficulty: str) -> Dict[str, str]:
+    def _record_generation(self, profile: str, num_tokens: int):
+        """Track how many tokens a profile spends per card"""
+        with self._stats_lock:
+            stats = self.generation_stats.setdefault(profile, {'cards': 0, 'tokens': 0})
+            stats['cards'] += 1
+            stats['tokens'] += num_tokens
+    
+    def get_generation_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return measured tokens generated per card for each profile"""
+        with self._stats_lock:
+            return {
+                profile: {
+                    'cards': stats['cards'],
+                    'tokens': stats['tokens'],
+                    'tokens_per_card': stats['tokens'] / stats['cards'] if stats['cards'] else 0.0
+                }
+                for profile, stats in self.generation_stats.items()
+            }
+    
+    def _generate_question_answer_with_llm(self, text: str, subject: str, difficulty: str,
+                                           profile: str = DEFAULT_PROFILE,
+                                           language: str = "English") -> Dict[str, str]:
         """Generate Q&A using the LLM"""
-        if not self.generator:
-            return self._generate_question_answer_fallback(text, subject, difficulty)
+        if not self.tiers:
+            return self._generate_question_answer_fallback(text, subject, difficulty, language)
         
         # Create prompts based on subject and difficulty
         subject_context = {
@@ -155,16 +275,49 @@ Generate one clear question and its complete answer. Format your response as:
 Question: [Your question here]
 Answer: [Your detailed answer here]"""
         
-        try:
-            result = self.generator(prompt, max_length=300, num_return_sequences=1)
-            generated_text = result[0]['generated_text']
+        if profile not in GENERATION_PROFILES:
+            profile = DEFAULT_PROFILE
+        
+        # Start at the cheapest tier the router trusts, escalate on unusable output
+        start = self.router.route(difficulty, text, len(self.tiers))
+        for level in range(start, len(self.tiers)):
+            # Evicted models are reloaded transparently on use
+            with self.lifecycle.use(self.tiers[level]) as tier:
+                if tier is None:
+                    continue
+                try:
+                    # Batched with prompts from other sessions by the tier's shared scheduler
+                    result = tier.scheduler.generate(prompt, timeout=self.generation_timeout_s,
+                                                     truncation=True, num_return_sequences=1,
+                                                     **tier.generation_kwargs[profile])
+                    generated_text = result[0]['generated_text']
+                    # Counted by the scheduler thread; the shared tokenizer is not thread-safe
+                    self._record_generation(profile, result[0].get('generated_tokens', len(generated_text.split())))
+                except Exception as e:
+                    print(f"LLM generation failed on {tier.name}: {e}")
+                    continue
             
             # Parse the generated text
-            return self._parse_qa_response(generated_text, difficulty)
-            
-        except Exception as e:
-            print(f"LLM generation failed: {e}")
-            return self._generate_question_answer_fallback(text, subject, difficulty)
+            qa_pair = self._parse_qa_response(generated_text, difficulty)
+            if level == len(self.tiers) - 1 or self._is_usable(qa_pair):
+                self.router.record(tier.name, escalated=level > start)
+                return qa_pair
+        
+        return self._generate_question_answer_fallback(text, subject, difficulty, language)
+    
+    def _is_usable(self, qa_pair: Dict[str, str]) -> bool:
+        """Whether a parsed response is good enough to skip the larger model"""
+        if qa_pair['question'] == UNPARSED_QUESTION:
+            return False
+        return not ValidationUtils.validate_flashcard(qa_pair)
+    
+    def get_tier_stats(self) -> Dict[str, Any]:
+        """Share of cards served by each model of the cascade"""
+        return self.router.get_stats()
+    
+    def get_model_events(self) -> List[Dict[str, Any]]:
+        """Model load and unload events, for capacity planning"""
+        return self.lifecycle.get_events()
     
     def _parse_qa_response(self, response: str, difficulty: str) -> Dict[str, str]:
         """Parse the LLM response to extract question and answer"""
@@ -190,7 +343,7 @@ Answer: [Your detailed answer here]"""
                 answer = parts[1].strip()
             else:
                 # Last resort: create from content
-                question = "What is the main concept discussed in this content?"
+                question = UNPARSED_QUESTION
                 answer = response[:200] + "..."
         
         return {
@@ -199,116 +352,131 @@ Answer: [Your detailed answer here]"""
             'difficulty': difficulty
         }
     
-    def _generate_question_answer_fallback(self, text: str, subject: str, difficulty: str) -> Dict[str, str]:
+    def _generate_question_answer_fallback(self, text: str, subject: str, difficulty: str,
+                                           language: str = "English") -> Dict[str, str]:
         """Fallback method for generating Q&A without LLM"""
-        sentences = sent_tokenize(text)
-        if not sentences:
-            return None
-        
-        # Simple rule-based question generation
-        key_sentence = random.choice(sentences[:min(10, len(sentences))])
-        
-        # Generate different types of questions based on patterns
-        question_templates = [
-            f"What is mentioned about {self._extract_main_subject(key_sentence)}?",
-            f"Explain the concept related to {self._extract_main_subject(key_sentence)}.",
-            f"What are the key points about {self._extract_main_subject(key_sentence)}?",
-            f"Describe {self._extract_main_subject(key_sentence)}.",
-            "What is the main idea presented in this content?",
-            "What are the important details mentioned?",
-            "How would you summarize this information?"
-        ]
-        
-        question = random.choice(question_templates)
-        answer = key_sentence
-        
-        return {
-            'question': question,
-            'answer': answer,
-            'difficulty': difficulty
-        }
-    
-    def _extract_main_subject(self, sentence: str) -> str:
-        """Extract main subject from a sentence"""
-        words = word_tokenize(sentence)
-        # Simple heuristic: look for nouns
-        nouns = [word for word in words if word.isalpha() and len(word) > 3]
-        return nouns[0] if nouns else "the topic"
+        return self.rule_engine.generate_from_chunk(text, difficulty, language)
     
     def generate_flashcards(self, content: str, subject: str, difficulty: str, 
-                          num_cards: int, language: str = "English") -> List[Dict[str, Any]]:
-        """Generate flashcards from content"""
+                          num_cards: int, language: str = "English",
+                          profile: str = DEFAULT_PROFILE, mode: str = "auto") -> List[Dict[str, Any]]:
+        """Generate flashcards from content using the named generation profile and mode"""
+        self.check_mode(mode)
+        
         if not content.strip():
             return []
         
-        # Chunk the content
-        chunks = self._chunk_text(content)
+        # Detect topics: sections come from headings and page markers
+        sections = self._build_section_index(content)
+        # If no clear headings are found, use top 5 key concepts as topics
+        fallback_topics = [] if sections.has_headings else self._extract_key_concepts(content, language)[:5]
+        
+        # Tokenize once; chunking and the rule-based engine share the sentences
+        sentences = self.nlp.sent_tokenize(content, language)
         
-        # Detect topics
-        topics = self._detect_topics(content)
+        if self.uses_rules(mode):
+            analysis = self.rule_engine.analyze(content, language, sentences=sentences)
+            return self._generate_flashcards_with_rules(content, subject, difficulty, num_cards,
+                                                        language, sections, fallback_topics, analysis)
         
         flashcards = []
         
         # Generate cards from chunks
-        for i, chunk in enumerate(chunks):
+        for current_topic, chunk in self.plan_chunks(content, language, sections, fallback_topics, sentences):
             if len(flashcards) >= num_cards:
                 break
             
-            # Assign difficulty
-            if difficulty == "Mixed":
-                current_difficulty = random.choice(["Easy", "Medium", "Hard"])
-            else:
-                current_difficulty = difficulty
-            
-            # Assign topic
-            current_topic = topics[i % len(topics)] if topics else "General"
-            
-            # Generate Q&A
-            qa_pair = self._generate_question_answer_with_llm(chunk, subject, current_difficulty)
-            
-            if qa_pair:
-                flashcard = {
-                    'question': qa_pair['question'],
-                    'answer': qa_pair['answer'],
-                    'difficulty': current_difficulty,
-                    'topic': current_topic,
-                    'subject': subject,
-                    'language': language
-                }
+            flashcard = self.generate_card(chunk, subject, difficulty, current_topic, language, profile, mode)
+            if flashcard:
                 flashcards.append(flashcard)
         
         # If we don't have enough cards, generate more from key concepts
+        return self.top_up(flashcards, content, subject, difficulty, num_cards, language,
+                           sections, fallback_topics, sentences)
+    
+    def plan_chunks(self, content: str, language: str = "English", sections: Optional[SectionIndex] = None,
+                    fallback_topics: Optional[List[str]] = None,
+                    sentences: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+        """Chunk the content and pair each chunk with the topic of the section it starts in"""
+        if sections is None:
+            sections = self._build_section_index(content)
+        if fallback_topics is None:
+            fallback_topics = [] if sections.has_headings else self._extract_key_concepts(content, language)[:5]
+        
+        chunks = self._chunk_text_with_offsets(content, language=language, sentences=sentences)
+        return [
+            (self._assign_topic(sections, offset, fallback_topics, i), chunk)
+            for i, (offset, chunk) in enumerate(chunks)
+        ]
+    
+    def generate_card(self, chunk: str, subject: str, difficulty: str, topic: str,
+                      language: str = "English", profile: str = DEFAULT_PROFILE,
+                      mode: str = "auto") -> Optional[Dict[str, Any]]:
+        """Generate one flashcard from one chunk of content"""
+        # Assign difficulty
+        if difficulty == "Mixed":
+            current_difficulty = random.choice(["Easy", "Medium", "Hard"])
+        else:
+            current_difficulty = difficulty
+        
+        if self.uses_rules(mode):
+            qa_pair = self.rule_engine.generate_from_chunk(chunk, current_difficulty, language)
+        else:
+            qa_pair = self._generate_question_answer_with_llm(chunk, subject, current_difficulty,
+                                                              profile, language)
+        if not qa_pair:
+            return None
+        
+        qa_pair['difficulty'] = current_difficulty
+        return self._make_flashcard(qa_pair, topic, subject, language)
+    
+    def top_up(self, flashcards: List[Dict[str, Any]], content: str, subject: str, difficulty: str,
+               num_cards: int, language: str = "English", sections: Optional[SectionIndex] = None,
+               fallback_topics: Optional[List[str]] = None,
+               sentences: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Fill ``flashcards`` up to ``num_cards`` with key-concept cards from the whole content"""
+        if len(flashcards) < num_cards:
+            if sections is None:
+                sections = self._build_section_index(content)
+            if fallback_topics is None:
+                fallback_topics = [] if sections.has_headings else self._extract_key_concepts(content, language)[:5]
+            analysis = self.rule_engine.analyze(content, language, sentences=sentences)
+        
         while len(flashcards) < num_cards:
-            key_concepts = self._extract_key_concepts(content)
-            if not key_concepts:
+            qa_pair = self.rule_engine.concept_card(analysis, subject, difficulty)
+            if not qa_pair:
                 break
             
-            concept = random.choice(key_concepts)
-            current_difficulty = random.choice(["Easy", "Medium", "Hard"]) if difficulty == "Mixed" else difficulty
-            current_topic = topics[len(flashcards) % len(topics)] if topics else "General"
-            
-            # Create concept-based question
-            concept_questions = [
-                f"What is {concept}?",
-                f"Define {concept}.",
-                f"Explain the significance of {concept}.",
-                f"What are the key characteristics of {concept}?"
-            ]
-            
-            question = random.choice(concept_questions)
-            
-            # Find relevant content for answer
-            relevant_sentences = [s for s in sent_tokenize(content) if concept in s.lower()]
-            answer = relevant_sentences[0] if relevant_sentences else f"A key concept related to {subject}."
-            
-            flashcard = {
-                'question': question,
-                'answer': answer,
-                'difficulty': current_difficulty,
-                'topic': current_topic,
-                'subject': subject,
-                'language': language
-            }
-            flashcards.append(flashcard)
+            current_topic = self._assign_topic(sections, qa_pair.get('offset'), fallback_topics,
+                                               len(flashcards))
+            flashcards.append(self._make_flashcard(qa_pair, current_topic, subject, language))
         
-        return flashcards[:num_cards]
\ No newline at end of file
+        return flashcards[:num_cards]
+    
+    def _make_flashcard(self, qa_pair: Dict[str, str], topic: str, subject: str,
+                        language: str) -> Dict[str, Any]:
+        """Build the flashcard dict stored in the deck"""
+        return {
+            'question': qa_pair['question'],
+            'answer': qa_pair['answer'],
+            'difficulty': qa_pair['difficulty'],
+            'topic': topic,
+            'subject': subject,
+            'language': language
+        }
+    
+    def _generate_flashcards_with_rules(self, content: str, subject: str, difficulty: str, num_cards: int,
+                                        language: str, sections: SectionIndex,
+                                        fallback_topics: List[str], analysis=None) -> List[Dict[str, Any]]:
+        """Generate the whole deck with the rule-based engine"""
+        qa_pairs = self.rule_engine.generate(content, subject, difficulty, num_cards,
+                                             analysis=analysis, language=language)
+        return [
+            self._make_flashcard(
+                qa_pair,
+                self._assign_topic(sections, qa_pair.get('offset'), fallback_topics, i),
+                subject,
+                language
+            )
+            for i, qa_pair in enumerate(qa_pairs)
+        ]
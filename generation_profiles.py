@@ -0,0 +1,63 @@
+import re
+from typing import Dict, Any
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+# Named decoding presets. max_new_tokens bounds the answer itself instead of
+# the old max_length, and the stopping criterion ends decoding once the
+# answer line of a "Question: ... Answer: ..." pair has been closed by a newline.
+GENERATION_PROFILES = {
+    "fast": {
+        "max_new_tokens": 64,
+        "do_sample": False,
+        "num_beams": 1,
+    },
+    "balanced": {
+        "max_new_tokens": 128,
+        "do_sample": False,
+        "num_beams": 1,
+    },
+    "quality": {
+        "max_new_tokens": 192,
+        "do_sample": True,
+        "temperature": 0.7,
+        "top_p": 0.9,
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+class AnswerLineStoppingCriteria(StoppingCriteria):
+    """Stop decoding once every sequence in the batch holds a complete answer line"""
+
+    # An answer is complete once its line ends. A sentence end is not enough: decimals
+    # ("3.5") and abbreviations ("Dr.") would cut it short, and models that cannot
+    # emit newlines (Flan-T5) stop at EOS or max_new_tokens instead
+    _complete_answer = re.compile(r'answer:[^\n]*\S[^\n]*\n', re.IGNORECASE)
+
+    def __init__(self, tokenizer, min_new_tokens: int = 8):
+        self.tokenizer = tokenizer
+        self.eos_token_id = tokenizer.eos_token_id
+        self.min_new_tokens = min_new_tokens
+
+    def _is_done(self, token_ids) -> bool:
+        if self.eos_token_id is not None and self.eos_token_id in token_ids:
+            return True
+        text = self.tokenizer.decode(token_ids, skip_special_tokens=True)
+        return bool(self._complete_answer.search(text))
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        if input_ids.shape[-1] < self.min_new_tokens:
+            return False
+        return all(self._is_done(row.tolist()) for row in input_ids)
+
+
+def build_generation_kwargs(tokenizer) -> Dict[str, Dict[str, Any]]:
+    """Build pipeline kwargs for every profile, sharing one stopping criterion each"""
+    profiles = {}
+    for name, settings in GENERATION_PROFILES.items():
+        kwargs = dict(settings)
+        if tokenizer is not None:
+            kwargs["stopping_criteria"] = StoppingCriteriaList([AnswerLineStoppingCriteria(tokenizer)])
+        profiles[name] = kwargs
+    return profiles
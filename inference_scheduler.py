@@ -0,0 +1,232 @@
+import concurrent.futures
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class _PendingRequest:
+    """A prompt waiting to be batched, plus the future its caller is blocked on"""
+
+    __slots__ = ('prompt', 'generate_kwargs', 'group_key', 'future', 'enqueued_at', 'num_tokens')
+
+    def __init__(self, prompt: str, generate_kwargs: Dict[str, Any], group_key: Tuple):
+        self.prompt = prompt
+        self.generate_kwargs = generate_kwargs
+        self.group_key = group_key
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+        # Counted on the scheduler thread, the only thread that uses the tokenizer
+        self.num_tokens: Optional[int] = None
+
+
+class InferenceScheduler:
+    """Micro-batching scheduler shared by every caller of a text2text pipeline.
+
+    Prompts submitted from any thread (e.g. concurrent Streamlit sessions) are
+    collected for at most ``max_wait_ms``, grouped by generation kwargs,
+    bucketed by token length to keep padding low and run through the
+    pipeline as one batch per bucket. Results are routed back to each
+    caller's future, with the number of generated tokens added to each
+    result as ``generated_tokens``.
+
+    Fast tokenizers are not safe to call from several threads at once, so
+    the tokenizer is only ever used from the scheduler thread.
+    """
+
+    def __init__(self, generator, tokenizer=None, max_batch_size: int = 8,
+                 max_wait_ms: float = 50.0, bucket_width: int = 64):
+        self.generator = generator
+        self.tokenizer = tokenizer
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.bucket_width = max(1, bucket_width)
+
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'batched_prompts': 0,
+            'total_queue_wait': 0.0,
+        }
+        self._worker = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt: str, **generate_kwargs) -> Future:
+        """Queue a prompt for batched generation and return a future for its result"""
+        if self._stop.is_set():
+            raise RuntimeError("Inference scheduler has been shut down")
+
+        request = _PendingRequest(prompt, generate_kwargs, self._group_key(generate_kwargs))
+        self._queue.put(request)
+        return request.future
+
+    def generate(self, prompt: str, timeout: Optional[float] = None, **generate_kwargs) -> List[Dict[str, str]]:
+        """Blocking helper with the same return shape as calling the pipeline directly"""
+        future = self.submit(prompt, **generate_kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            # Still queued: the prompt is dropped instead of taking a slot in a later batch
+            future.cancel()
+            raise
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker thread, failing any prompts still queued"""
+        self._stop.set()
+        self._queue.put(None)
+        if wait:
+            self._worker.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return batching statistics collected so far"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats['batches']
+        stats['avg_batch_size'] = stats['batched_prompts'] / batches if batches else 0.0
+        stats['avg_queue_wait_ms'] = (stats['total_queue_wait'] / stats['requests'] * 1000.0
+                                      if stats['requests'] else 0.0)
+        return stats
+
+    def _count_tokens(self, prompt: str) -> int:
+        """Approximate the prompt's token length for bucketing"""
+        if self.tokenizer is not None:
+            try:
+                return len(self.tokenizer(prompt, truncation=True)['input_ids'])
+            except Exception:
+                pass
+        return len(prompt.split())
+
+    def _count_generated(self, text: str) -> int:
+        """Number of tokens in a generated text"""
+        if self.tokenizer is not None:
+            try:
+                return len(self.tokenizer(text, add_special_tokens=False, truncation=False)['input_ids'])
+            except Exception:
+                pass
+        return len(text.split())
+
+    @staticmethod
+    def _group_key(generate_kwargs: Dict[str, Any]) -> Tuple:
+        """Prompts can only share a batch if they use identical generation kwargs"""
+        key = []
+        for name, value in sorted(generate_kwargs.items()):
+            try:
+                hash(value)
+                key.append((name, value))
+            except TypeError:
+                # Unhashable values (e.g. stopping criteria lists) are shared objects
+                key.append((name, id(value)))
+        return tuple(key)
+
+    def _collect(self) -> List[_PendingRequest]:
+        """Block for the first prompt, then gather more until the window closes"""
+        first = self._queue.get()
+        if first is None:
+            return []
+
+        pending = [first]
+        deadline = first.enqueued_at + self.max_wait
+        # Gather enough prompts to fill a few buckets, not just one batch
+        limit = self.max_batch_size * 4
+        while len(pending) < limit:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    request = self._queue.get(timeout=remaining)
+                else:
+                    # Window closed: only take prompts that are already waiting
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._stop.set()
+                break
+            pending.append(request)
+        return pending
+
+    def _make_batches(self, pending: List[_PendingRequest]) -> List[List[_PendingRequest]]:
+        """Split pending prompts into batches of equal kwargs and similar length"""
+        groups = {}
+        for request in pending:
+            groups.setdefault(request.group_key, []).append(request)
+
+        batches = []
+        for requests in groups.values():
+            for request in requests:
+                request.num_tokens = self._count_tokens(request.prompt)
+            requests.sort(key=lambda r: r.num_tokens)
+            buckets = {}
+            for request in requests:
+                buckets.setdefault(request.num_tokens // self.bucket_width, []).append(request)
+            for bucket in buckets.values():
+                for start in range(0, len(bucket), self.max_batch_size):
+                    batches.append(bucket[start:start + self.max_batch_size])
+        return batches
+
+    @staticmethod
+    def _fail(requests: List[_PendingRequest], error: BaseException):
+        """Fail every future in ``requests`` that is still unresolved"""
+        for request in requests:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def _run_batch(self, batch: List[_PendingRequest]):
+        """Run one batch through the pipeline and resolve its futures"""
+        prompts = [request.prompt for request in batch]
+        try:
+            results = list(self.generator(prompts, batch_size=len(prompts), **batch[0].generate_kwargs))
+            for request, result in zip(batch, results):
+                # The pipeline returns a list per prompt when given a list of prompts
+                result = result if isinstance(result, list) else [result]
+                for sequence in result:
+                    sequence['generated_tokens'] = self._count_generated(sequence.get('generated_text', ''))
+                request.future.set_result(result)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        if len(results) < len(batch):
+            self._fail(batch, RuntimeError(f"Pipeline returned {len(results)} results for {len(batch)} prompts"))
+
+    def _run(self):
+        try:
+            while True:
+                # Callers that timed out cancelled their still-queued prompts; skip those
+                pending = [request for request in self._collect()
+                           if request.future.set_running_or_notify_cancel()]
+                try:
+                    self._run_pending(pending)
+                except Exception as e:
+                    # Never leave a caller blocked on a prompt whose batch could not be run
+                    self._fail(pending, e)
+
+                if self._stop.is_set():
+                    break
+        finally:
+            # Fail anything that arrived after shutdown, or everything if this thread is dying
+            self._stop.set()
+            while True:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is not None:
+                    self._fail([request], RuntimeError("Inference scheduler has been shut down"))
+
+    def _run_pending(self, pending: List[_PendingRequest]):
+        if not pending:
+            return
+        started = time.monotonic()
+        with self._stats_lock:
+            self._stats['requests'] += len(pending)
+            self._stats['total_queue_wait'] += sum(started - r.enqueued_at for r in pending)
+
+        for batch in self._make_batches(pending):
+            self._run_batch(batch)
+            with self._stats_lock:
+                self._stats['batches'] += 1
+                self._stats['batched_prompts'] += len(batch)
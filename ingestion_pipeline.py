@@ -0,0 +1,330 @@
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+
+from file_processor import FileProcessor, ContentCleaner
+from generation_profiles import DEFAULT_PROFILE
+from section_index import SectionIndex
+from utils import ValidationUtils
+
+# Order of the stages; each one reads the queue filled by the previous one
+STAGES = ["extract", "clean", "chunk", "generate", "validate"]
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class _StageStats:
+    """Counters for one stage, shared by its worker threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = 0
+        self.busy_s = 0.0
+        self.starved_s = 0.0
+        self.blocked_s = 0.0
+        self.max_queue_depth = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+
+    def sample_depth(self, depth: int):
+        with self.lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self.depth_total += depth
+            self.depth_samples += 1
+
+    def add(self, field: str, seconds: float):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'items': self.items,
+                'busy_s': round(self.busy_s, 3),
+                # Waiting for input (the previous stage is slower)
+                'starved_s': round(self.starved_s, 3),
+                # Waiting for room downstream (backpressure from a slower stage)
+                'blocked_s': round(self.blocked_s, 3),
+                'max_queue_depth': self.max_queue_depth,
+                'avg_queue_depth': round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0
+            }
+
+
+class IngestionPipeline:
+    """Overlaps extraction, cleaning, chunking, generation and validation.
+
+    Each stage runs in its own thread(s) and hands items to the next through
+    a bounded queue, so a fast stage blocks once it is ``queue_size`` items
+    ahead instead of buffering the whole document. Generation uses several
+    workers so their prompts can share micro-batches in the model scheduler.
+    End-to-end time approaches that of the slowest stage; per-stage queue
+    depth and stall times show which stage that is.
+    """
+
+    def __init__(self, generator, file_processor: Optional[FileProcessor] = None,
+                 queue_size: int = 8, generate_workers: Optional[int] = None,
+                 max_chunk_size: int = 1000):
+        self.generator = generator
+        self.file_processor = file_processor or FileProcessor()
+        self.queue_size = queue_size
+        self.generate_workers = generate_workers or getattr(generator, 'max_batch_size', 4)
+        self.max_chunk_size = max_chunk_size
+
+        self.content = ""
+        # False when the last run stopped before the whole document was extracted
+        self.content_complete = True
+        self.cleaner = ContentCleaner()
+        self._stats: Dict[str, _StageStats] = {}
+        self._timings: Dict[str, Optional[float]] = {}
+
+    def run(self, uploaded_file, subject: str, difficulty: str, num_cards: int,
+            language: str = "English", profile: str = DEFAULT_PROFILE,
+            mode: str = "auto") -> List[Dict[str, Any]]:
+        """Generate flashcards from an uploaded file while it is still being extracted"""
+        return self.run_pages(self.file_processor.iter_pages(uploaded_file), subject, difficulty,
+                              num_cards, language, profile, mode)
+
+    def run_pages(self, pages: Iterable[Tuple[Optional[int], str]], subject: str, difficulty: str,
+                  num_cards: int, language: str = "English", profile: str = DEFAULT_PROFILE,
+                  mode: str = "auto") -> List[Dict[str, Any]]:
+        """Generate flashcards from ``(page_number, text)`` pieces"""
+        self.generator.check_mode(mode)
+        self._stats = {stage: _StageStats() for stage in STAGES}
+        started = time.time()
+        self._timings = {'started': started, 'first_card_s': None, 'total_s': None}
+        # Running headers are learned page by page, so each run starts fresh
+        self.cleaner.reset()
+        # The rule-based engine analyzes the whole document, so only extraction and cleaning overlap
+        rules = self.generator.uses_rules(mode)
+
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        page_queue = queue.Queue(self.queue_size)
+        clean_queue = queue.Queue(self.queue_size)
+        chunk_queue = queue.Queue(self.queue_size)
+        card_queue = queue.Queue(self.queue_size)
+        cleaned_pages: List[str] = []
+
+        def emit(ready):
+            outputs = []
+            for page_num, cleaned in ready:
+                if page_num is not None:
+                    cleaned_pages.append(f"\n--- Page {page_num} ---\n{cleaned}\n")
+                else:
+                    cleaned_pages.append(cleaned + "\n\n")
+                # Headings are found after cleaning; the cleaner holds back the first pages
+                # until it has seen enough of them, so a running header is not taken for a topic
+                if cleaned.strip():
+                    outputs.append((page_num, cleaned, SectionIndex(cleaned)))
+            return outputs
+
+        def clean(item):
+            page_num, text = item
+            return emit(self.cleaner.feed_page(text, page_num))
+
+        def flush():
+            return emit(self.cleaner.flush())
+
+        sequence = itertools.count()
+        # Last heading seen so far; chunks before a page's first heading belong to it
+        carried = {'heading': None}
+
+        def chunk(item):
+            page_num, text, sections = item
+            chunks = []
+            for offset, chunk_text in self.generator._chunk_text_with_offsets(text, self.max_chunk_size, language):
+                topic = sections.topic_at(offset) or carried['heading']
+                if topic is None and page_num is not None:
+                    topic = f"Page {page_num}"
+                chunks.append((next(sequence), topic, chunk_text))
+            if sections.has_headings:
+                carried['heading'] = sections.headings[-1]
+            return chunks
+
+        def generate(item):
+            seq, topic, text = item
+            card = self.generator.generate_card(text, subject, difficulty, topic or "General",
+                                                language, profile, mode)
+            return [(seq, card)] if card else []
+
+        extraction = {'complete': False}
+
+        def extract():
+            yield from pages
+            extraction['complete'] = True
+
+        stages = [
+            ("extract", None, extract(), page_queue, 1, None),
+            ("clean", clean, page_queue, clean_queue, 1, flush),
+        ]
+        if not rules:
+            stages += [
+                ("chunk", chunk, clean_queue, chunk_queue, 1, None),
+                ("generate", generate, chunk_queue, card_queue, self.generate_workers, None),
+            ]
+        threads = [
+            self._start(stage, worker, source, sink, stop, errors, workers, finish)
+            for stage, worker, source, sink, workers, finish in stages
+        ]
+
+        if rules:
+            self._drain(clean_queue, stop)
+            cards = []
+        else:
+            cards = self._validate(card_queue, num_cards, stop)
+        stop.set()
+        for stage_threads in threads:
+            for thread in stage_threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+
+        self.content = "".join(cleaned_pages)
+        # After an early stop only the pages extracted so far are in self.content
+        self.content_complete = extraction['complete']
+        if not self.content.strip():
+            raise ValueError("No text content could be extracted from the file")
+        if rules:
+            flashcards = self.generator.generate_flashcards(self.content, subject, difficulty, num_cards,
+                                                            language, profile, mode)
+            self._timings['first_card_s'] = time.time() - started
+        else:
+            # Workers finish out of order; keep the cards in document order
+            flashcards = [card for _, card in sorted(cards, key=lambda pair: pair[0])]
+            if len(flashcards) < num_cards:
+                flashcards = self.generator.top_up(flashcards, self.content, subject, difficulty,
+                                                   num_cards, language)
+
+        self._timings['total_s'] = time.time() - started
+        return flashcards[:num_cards]
+
+    def _start(self, stage: str, worker: Optional[Callable], source, sink: queue.Queue,
+               stop: threading.Event, errors: List[BaseException], workers: int,
+               finish: Optional[Callable] = None) -> List[threading.Thread]:
+        """Run a stage in ``workers`` threads; ``finish`` (single-worker stages only) emits held-back items"""
+        stats = self._stats[stage]
+        remaining = [workers]
+        remaining_lock = threading.Lock()
+
+        def run():
+            try:
+                if worker is None:
+                    self._produce(source, sink, stats, stop)
+                else:
+                    self._consume(worker, source, sink, stats, stop)
+                if finish is not None:
+                    for output in finish():
+                        self._put(sink, output, stats, stop)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                # The last worker of a stage tells the next stage there is no more input
+                with remaining_lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    self._put(sink, _DONE, None, stop)
+
+        threads = [threading.Thread(target=run, name=f"ingest-{stage}-{i}", daemon=True) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _produce(self, source: Iterable, sink: queue.Queue, stats: _StageStats, stop: threading.Event):
+        iterator = iter(source)
+        while not stop.is_set():
+            began = time.time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            stats.add('busy_s', time.time() - began)
+            with stats.lock:
+                stats.items += 1
+            self._put(sink, item, stats, stop)
+
+    def _consume(self, worker: Callable, source: queue.Queue, sink: queue.Queue,
+                 stats: _StageStats, stop: threading.Event):
+        while True:
+            item = self._get(source, stats, stop)
+            if item is _DONE:
+                # Let sibling workers of this stage see the end of input too
+                self._put(source, _DONE, None, stop)
+                return
+            if stop.is_set():
+                # Enough cards already; drop the item rather than spend a model call on it
+                return
+
+            began = time.time()
+            outputs = worker(item)
+            stats.add('busy_s', time.time() - began)
+            with stats.lock:
+                stats.items += 1
+            for output in outputs:
+                self._put(sink, output, stats, stop)
+
+    def _validate(self, source: queue.Queue, num_cards: int, stop: threading.Event) -> List[Tuple[int, Dict[str, Any]]]:
+        stats = self._stats["validate"]
+        cards = []
+        while len(cards) < num_cards:
+            item = self._get(source, stats, stop)
+            if item is _DONE:
+                break
+
+            began = time.time()
+            seq, card = item
+            if not ValidationUtils.validate_flashcard(card):
+                cards.append((seq, card))
+                if self._timings['first_card_s'] is None:
+                    self._timings['first_card_s'] = time.time() - self._timings['started']
+            stats.add('busy_s', time.time() - began)
+            with stats.lock:
+                stats.items += 1
+        return cards
+
+    def _drain(self, source: queue.Queue, stop: threading.Event):
+        """Wait for the last stage to finish when its output is collected elsewhere"""
+        while self._get(source, self._stats["validate"], stop) is not _DONE:
+            pass
+
+    @staticmethod
+    def _get(source: queue.Queue, stats: _StageStats, stop: threading.Event):
+        stats.sample_depth(source.qsize())
+        began = time.time()
+        # Checked before every attempt, so a stopped run hands out no more queued items
+        item = _DONE
+        while not stop.is_set():
+            try:
+                item = source.get(timeout=0.1)
+                break
+            except queue.Empty:
+                pass
+        stats.add('starved_s', time.time() - began)
+        return item
+
+    @staticmethod
+    def _put(sink: queue.Queue, item, stats: Optional[_StageStats], stop: threading.Event):
+        began = time.time()
+        # Once stopped, items are dropped instead of being passed downstream
+        while not stop.is_set():
+            try:
+                sink.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        if stats is not None:
+            stats.add('blocked_s', time.time() - began)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-stage items, busy time, stall times and input queue depth of the last run"""
+        return {
+            'stages': {stage: stats.as_dict() for stage, stats in self._stats.items()},
+            'cleaning': self.cleaner.get_stats(),
+            'content_complete': self.content_complete,
+            'first_card_s': round(self._timings['first_card_s'], 3) if self._timings.get('first_card_s') is not None else None,
+            'total_s': round(self._timings['total_s'], 3) if self._timings.get('total_s') is not None else None
+        }
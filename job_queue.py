@@ -0,0 +1,417 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from deck_store import DeckStore, SCHEMA as DECK_SCHEMA
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    document BLOB NOT NULL,
+    file_type TEXT NOT NULL,
+    params TEXT NOT NULL,
+    content TEXT,
+    num_tasks INTEGER NOT NULL DEFAULT 0,
+    deck_id INTEGER,
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    topic TEXT NOT NULL,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_tasks_job ON tasks(job_id, seq);
+"""
+
+# A job is planned (extracted, cleaned, chunked) by one worker, its chunk tasks
+# are generated by any number of workers, and the last step collects the cards
+# into a deck. Planning and finishing hold a lease on the job itself.
+JOB_STATUSES = ["queued", "planning", "running", "finishing", "done", "failed"]
+TASK_STATUSES = ["pending", "leased", "done", "failed"]
+
+
+class WorkQueue:
+    """Operations the app and workers need from a job queue.
+
+    JobQueue implements them on SQLite for a single host; a queue backed by
+    a message broker and a shared database can implement the same methods
+    to spread workers over many machines. Every method that takes ``owner``
+    only acts while that worker holds the lease, and returns False (or
+    None) otherwise.
+    """
+
+    # Seconds a claim lasts without renewal
+    lease_s: float
+
+    def submit(self, document: bytes, file_type: str, params: Dict[str, Any]) -> int:
+        """Queue a document with its generation parameters and return the job id"""
+        raise NotImplementedError
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Job status with task progress"""
+        raise NotImplementedError
+
+    def list_jobs(self, job_ids: Optional[List[int]] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Status of the given jobs, or of the most recent ones"""
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Number of jobs and tasks in each status"""
+        raise NotImplementedError
+
+    def claim_job(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Lease a job that needs planning or finishing; 'stage' says which"""
+        raise NotImplementedError
+
+    def renew_job(self, job_id: int, owner: str) -> bool:
+        """Extend the lease on a job being planned or finished"""
+        raise NotImplementedError
+
+    def plan_job(self, job_id: int, owner: str, content: str, chunks: List[Tuple[str, str]]) -> bool:
+        """Store the cleaned content and one task per ``(topic, text)`` chunk"""
+        raise NotImplementedError
+
+    def start_deck(self, job_id: int, owner: str, name: str) -> Optional[int]:
+        """Create the job's deck and record it in one step, replacing one from an earlier attempt"""
+        raise NotImplementedError
+
+    def finish_job(self, job_id: int, owner: str) -> bool:
+        """Mark a job done once its deck has been written"""
+        raise NotImplementedError
+
+    def fail_job(self, job_id: int, owner: str, error: str) -> bool:
+        """Give up on a job"""
+        raise NotImplementedError
+
+    def task_results(self, job_id: int) -> List[Dict[str, Any]]:
+        """Cards produced by a job's tasks, in document order"""
+        raise NotImplementedError
+
+    def claim_task(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Lease a pending chunk task, or one whose lease has expired"""
+        raise NotImplementedError
+
+    def renew_task(self, task_id: int, owner: str) -> bool:
+        """Extend the lease on a task being generated"""
+        raise NotImplementedError
+
+    def complete_task(self, task_id: int, owner: str, card: Optional[Dict[str, Any]]) -> bool:
+        """Store a task's card (None if it produced nothing)"""
+        raise NotImplementedError
+
+    def fail_task(self, task_id: int, owner: str, error: str) -> bool:
+        """Release a task for retry, or fail it once it has used all its attempts"""
+        raise NotImplementedError
+
+
+class JobQueue(WorkQueue):
+    """Durable queue of generation jobs and their chunk tasks, backed by SQLite.
+
+    Workers claim work with a lease that expires after ``lease_s`` seconds
+    and keep it with ``renew_job``/``renew_task`` while they work. A worker
+    that crashes stops renewing; once the lease expires another worker picks
+    the work up again, up to ``max_attempts`` times. Completions are only
+    accepted from the current lease owner, so a worker that was presumed dead
+    cannot overwrite a newer result.
+
+    WAL mode and SQLite's file locks only coordinate processes on one host,
+    so every worker must run on the machine that holds the database file,
+    not against a network share. Decks are created in the same database.
+    """
+
+    def __init__(self, db_path: str = "flashcards.db", lease_s: float = 300.0, max_attempts: int = 3):
+        if db_path == ":memory:":
+            # Each thread's connection would get its own empty database
+            raise ValueError("JobQueue needs a database file; ':memory:' is private to one connection")
+        self.db_path = db_path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        with self._connection() as conn:
+            # start_deck writes decks in the same transaction as the job
+            conn.executescript(DECK_SCHEMA + SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Claims take the write lock up front; wait for other workers instead of failing
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        """Write transaction that holds the database lock from its first statement"""
+        return _ImmediateTransaction(self._connection())
+
+    # Submitting and reading
+
+    def submit(self, document: bytes, file_type: str, params: Dict[str, Any]) -> int:
+        """Queue a document with its generation parameters and return the job id"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """INSERT INTO jobs (document, file_type, params, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (document, file_type, json.dumps(params), now, now)
+            )
+            return cursor.lastrowid
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Job status with task progress, without the document itself"""
+        row = self._connection().execute(
+            """SELECT j.id, j.status, j.params, j.num_tasks, j.deck_id, j.attempts, j.error,
+                      j.created_at, j.updated_at,
+                      (SELECT COUNT(*) FROM tasks t WHERE t.job_id = j.id AND t.status IN ('done', 'failed'))
+                          AS finished_tasks
+               FROM jobs j WHERE j.id = ?""",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        return job
+
+    def list_jobs(self, job_ids: Optional[List[int]] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Status of the given jobs, or of the most recent ones"""
+        if job_ids is not None:
+            return [job for job in (self.get_job(job_id) for job_id in job_ids) if job is not None]
+        rows = self._connection().execute("SELECT id FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self.get_job(row[0]) for row in rows]
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Number of jobs and tasks in each status"""
+        conn = self._connection()
+        jobs = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        tasks = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        return {
+            'jobs': {status: jobs.get(status, 0) for status in JOB_STATUSES},
+            'tasks': {status: tasks.get(status, 0) for status in TASK_STATUSES},
+        }
+
+    # Job-level work: planning and finishing
+
+    def claim_job(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Lease a job that needs planning or finishing; 'stage' says which"""
+        now = time.time()
+        with self._transaction() as conn:
+            self._fail_exhausted(conn, now)
+            row = conn.execute(
+                """SELECT * FROM jobs
+                   WHERE status = 'queued'
+                      OR (status IN ('planning', 'finishing') AND lease_expires < ?)
+                      OR (status = 'running' AND NOT EXISTS (
+                              SELECT 1 FROM tasks t WHERE t.job_id = jobs.id
+                              AND t.status IN ('pending', 'leased')))
+                   ORDER BY id LIMIT 1""",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            stage = "plan" if row['status'] in ("queued", "planning") else "finish"
+            conn.execute(
+                """UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?,
+                       attempts = attempts + 1, updated_at = ?
+                   WHERE id = ?""",
+                ("planning" if stage == "plan" else "finishing", owner, now + self.lease_s, now, row['id'])
+            )
+
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['stage'] = stage
+        return job
+
+    def plan_job(self, job_id: int, owner: str, content: str, chunks: List[Tuple[str, str]]) -> bool:
+        """Store the cleaned content and one task per ``(topic, text)`` chunk"""
+        now = time.time()
+        with self._transaction() as conn:
+            if not self._owns_job(conn, job_id, owner, "planning"):
+                return False
+            # A planner that crashed part-way may have left tasks behind
+            conn.execute("DELETE FROM tasks WHERE job_id = ?", (job_id,))
+            conn.executemany(
+                "INSERT INTO tasks (job_id, seq, topic, text) VALUES (?, ?, ?, ?)",
+                ((job_id, seq, topic, text) for seq, (topic, text) in enumerate(chunks))
+            )
+            conn.execute(
+                """UPDATE jobs SET status = 'running', content = ?, num_tasks = ?,
+                       lease_owner = NULL, lease_expires = NULL, attempts = 0, updated_at = ?
+                   WHERE id = ?""",
+                (content, len(chunks), now, job_id)
+            )
+        return True
+
+    def start_deck(self, job_id: int, owner: str, name: str) -> Optional[int]:
+        """Create the job's deck and record it in the same transaction.
+
+        A crash can then never leave an unrecorded deck behind; a deck left
+        by an earlier finishing attempt is deleted here too.
+        """
+        with self._transaction() as conn:
+            if not self._owns_job(conn, job_id, owner, "finishing"):
+                return None
+            row = conn.execute("SELECT deck_id FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row['deck_id'] is not None:
+                conn.execute("DELETE FROM decks WHERE id = ?", (row['deck_id'],))
+            deck_id = DeckStore.insert_deck(conn, name)
+            conn.execute("UPDATE jobs SET deck_id = ?, updated_at = ? WHERE id = ?", (deck_id, time.time(), job_id))
+        return deck_id
+
+    def finish_job(self, job_id: int, owner: str) -> bool:
+        """Mark a job done once its deck has been written"""
+        with self._transaction() as conn:
+            if not self._owns_job(conn, job_id, owner, "finishing"):
+                return False
+            conn.execute(
+                """UPDATE jobs SET status = 'done', lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                   WHERE id = ?""",
+                (time.time(), job_id)
+            )
+        return True
+
+    def fail_job(self, job_id: int, owner: str, error: str) -> bool:
+        """Give up on a job, e.g. when its document cannot be read"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT lease_owner FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row['lease_owner'] != owner:
+                return False
+            conn.execute(
+                """UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, lease_expires = NULL,
+                       updated_at = ?
+                   WHERE id = ?""",
+                (error, time.time(), job_id)
+            )
+        return True
+
+    def renew_job(self, job_id: int, owner: str) -> bool:
+        """Extend the lease on a job being planned or finished; False if it was lost"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET lease_expires = ?, updated_at = ?
+                   WHERE id = ? AND status IN ('planning', 'finishing') AND lease_owner = ?""",
+                (now + self.lease_s, now, job_id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def task_results(self, job_id: int) -> List[Dict[str, Any]]:
+        """Cards produced by a job's tasks, in document order"""
+        rows = self._connection().execute(
+            "SELECT result FROM tasks WHERE job_id = ? AND status = 'done' AND result IS NOT NULL ORDER BY seq",
+            (job_id,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    # Task-level work: one chunk each
+
+    def claim_task(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Lease the oldest pending chunk task, or one whose lease has expired"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                """SELECT t.id, t.job_id, t.seq, t.topic, t.text, j.params
+                   FROM tasks t JOIN jobs j ON j.id = t.job_id
+                   WHERE j.status = 'running' AND t.attempts < ?
+                     AND (t.status = 'pending' OR (t.status = 'leased' AND t.lease_expires < ?))
+                   ORDER BY t.job_id, t.seq LIMIT 1""",
+                (self.max_attempts, now)
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                """UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                   WHERE id = ?""",
+                (owner, now + self.lease_s, row['id'])
+            )
+
+        task = dict(row)
+        task['params'] = json.loads(task['params'])
+        return task
+
+    def renew_task(self, task_id: int, owner: str) -> bool:
+        """Extend the lease on a task being generated; False if it was lost"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (time.time() + self.lease_s, task_id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def complete_task(self, task_id: int, owner: str, card: Optional[Dict[str, Any]]) -> bool:
+        """Store a task's card (None if it produced nothing); False if the lease was lost"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE tasks SET status = 'done', result = ?, lease_owner = NULL, lease_expires = NULL
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                (json.dumps(card) if card is not None else None, task_id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def fail_task(self, task_id: int, owner: str, error: str) -> bool:
+        """Release a task for retry, or fail it once it has used all its attempts"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                       error = ?, lease_owner = NULL, lease_expires = NULL
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                (self.max_attempts, error, task_id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def _owns_job(self, conn: sqlite3.Connection, job_id: int, owner: str, status: str) -> bool:
+        row = conn.execute("SELECT status, lease_owner FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is not None and row['status'] == status and row['lease_owner'] == owner
+
+    def _fail_exhausted(self, conn: sqlite3.Connection, now: float):
+        """Fail work whose lease expired after its last allowed attempt"""
+        conn.execute(
+            """UPDATE tasks SET status = 'failed', error = 'lease expired', lease_owner = NULL, lease_expires = NULL
+               WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+            (now, self.max_attempts)
+        )
+        conn.execute(
+            """UPDATE jobs SET status = 'failed', error = 'lease expired', lease_owner = NULL,
+                   lease_expires = NULL, updated_at = ?
+               WHERE status IN ('planning', 'finishing') AND lease_expires < ? AND attempts >= ?""",
+            (now, now, self.max_attempts)
+        )
+
+
+class _ImmediateTransaction:
+    """``with`` block around BEGIN IMMEDIATE ... COMMIT, rolled back on error"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
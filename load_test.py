@@ -0,0 +1,357 @@
+import argparse
+import io
+import json
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from flashcard_generator import FlashcardGenerator
+from generation_profiles import GENERATION_PROFILES, DEFAULT_PROFILE
+from inference_scheduler import InferenceScheduler
+from ingestion_pipeline import IngestionPipeline
+from model_cascade import ModelTier
+from model_lifecycle import current_rss_mb
+
+# Building blocks for synthetic documents, so the harness needs no input files
+SENTENCES = [
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "Mitochondria produce most of the cell's supply of adenosine triphosphate.",
+    "The French Revolution began in 1789 and transformed European politics.",
+    "Newton's second law states that force equals mass times acceleration.",
+    "An algorithm is a finite sequence of instructions for solving a problem.",
+    "Supply and demand determine the equilibrium price in a competitive market.",
+    "Covalent bonds form when atoms share pairs of electrons.",
+    "Classical conditioning pairs a neutral stimulus with an unconditioned stimulus.",
+    "A metaphor describes something by saying it is something else.",
+    "The derivative measures how a function changes as its input changes.",
+    "Enzymes are proteins that speed up chemical reactions in living organisms.",
+    "Binary search repeatedly halves a sorted list to find a target value.",
+]
+
+HEADINGS = [
+    "Cell Biology", "Modern History", "Classical Mechanics", "Data Structures",
+    "Market Economics", "Chemical Bonding", "Learning Theory", "Literary Devices",
+]
+
+# Default share of each document kind in the request mix
+DEFAULT_MIX = {"short": 3, "long": 1, "upload": 1}
+
+DOCUMENT_SHAPES = {
+    # kind: (sections, sentences per section)
+    "short": (1, 8),
+    "long": (10, 15),
+    "upload": (20, 12),
+}
+
+
+def make_document(kind: str, rng: random.Random) -> str:
+    """Synthetic educational text of the given kind; uploads get one section per page"""
+    sections, per_section = DOCUMENT_SHAPES[kind]
+    parts = []
+    for section in range(sections):
+        if kind == "upload":
+            parts.append(f"--- Page {section + 1} ---")
+        if sections > 1:
+            parts.append(rng.choice(HEADINGS))
+        parts.append(" ".join(rng.choice(SENTENCES) for _ in range(per_section)))
+    return "\n\n".join(parts)
+
+
+class _Upload(io.BytesIO):
+    """In-memory stand-in for a Streamlit UploadedFile"""
+
+    def __init__(self, content: str, name: str = "load_test.txt"):
+        super().__init__(content.encode('utf-8'))
+        self.type = "text/plain"
+        self.name = name
+
+
+class StubModel:
+    """Offline stand-in for a text2text pipeline with a fixed cost per batch and per prompt"""
+
+    _content = re.compile(r'Content:\s*(.+?)(?:\n|$)')
+    _word = re.compile(r'\b[A-Za-z]{6,}\b')
+
+    def __init__(self, batch_ms: float = 40.0, prompt_ms: float = 10.0):
+        self.batch_s = batch_ms / 1000.0
+        self.prompt_s = prompt_ms / 1000.0
+
+    def __call__(self, prompts, batch_size: int = None, **kwargs):
+        prompts = [prompts] if isinstance(prompts, str) else prompts
+        time.sleep(self.batch_s + self.prompt_s * len(prompts))
+        return [[{'generated_text': self._respond(prompt)}] for prompt in prompts]
+
+    def _respond(self, prompt: str) -> str:
+        match = self._content.search(prompt)
+        content = match.group(1) if match else prompt
+        sentence = content.split('. ')[0].rstrip('.') + '.'
+        word = self._word.search(sentence)
+        return f"Question: What is {word.group(0) if word else 'described here'}?\nAnswer: {sentence}"
+
+
+class StubFlashcardGenerator(FlashcardGenerator):
+    """FlashcardGenerator whose models are StubModels behind the real scheduler and lifecycle"""
+
+    def __init__(self, stub_batch_ms: float = 40.0, stub_prompt_ms: float = 10.0, **kwargs):
+        self.stub_batch_ms = stub_batch_ms
+        self.stub_prompt_ms = stub_prompt_ms
+        kwargs.setdefault('model_names', ["stub"])
+        super().__init__(**kwargs)
+
+    def _load_model(self, model_name: str) -> Optional[ModelTier]:
+        model = StubModel(self.stub_batch_ms, self.stub_prompt_ms)
+        scheduler = InferenceScheduler(model, max_batch_size=self.max_batch_size, max_wait_ms=self.batch_wait_ms)
+        return ModelTier(model_name, model, None, scheduler, {name: {} for name in GENERATION_PROFILES})
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse ``short=3,long=1,upload=1`` into document kind weights"""
+    mix = {}
+    for part in spec.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in DOCUMENT_SHAPES:
+            raise ValueError(f"Unknown document kind: {kind} (choose from {', '.join(DOCUMENT_SHAPES)})")
+        mix[kind] = float(weight) if weight else 1.0
+    return mix
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Linearly interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * p / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        'p50': round(percentile(values, 50), 4),
+        'p95': round(percentile(values, 95), 4),
+        'p99': round(percentile(values, 99), 4),
+        'max': round(values[-1], 4) if values else 0.0,
+    }
+
+
+class _MemorySampler:
+    """Samples RSS in the background to catch the peak during the run"""
+
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+class LoadTest:
+    """Runs flashcard requests from N concurrent simulated sessions.
+
+    In closed-loop mode (the default) each session sends its next request as
+    soon as the previous one returns. With ``arrival_rate`` requests arrive as
+    a Poisson process and wait for a free session, so queueing time shows how
+    far the system falls behind the offered load.
+    """
+
+    def __init__(self, generator: FlashcardGenerator, sessions: int = 10, requests_per_session: int = 5,
+                 mix: Optional[Dict[str, float]] = None, num_cards: int = 15, mode: str = "auto",
+                 profile: str = DEFAULT_PROFILE, arrival_rate: Optional[float] = None, seed: int = 0):
+        self.generator = generator
+        self.sessions = sessions
+        self.requests_per_session = requests_per_session
+        self.mix = mix or DEFAULT_MIX
+        self.num_cards = num_cards
+        self.mode = mode
+        self.profile = profile
+        self.arrival_rate = arrival_rate
+        self.rng = random.Random(seed)
+
+    def _request_kinds(self) -> List[str]:
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        return self.rng.choices(kinds, weights=weights, k=self.sessions * self.requests_per_session)
+
+    def _run_request(self, kind: str, document: str) -> int:
+        if kind == "upload":
+            # The FileProcessor path used by the app for uploaded files
+            pipeline = IngestionPipeline(self.generator)
+            cards = pipeline.run(_Upload(document), "General", "Mixed", self.num_cards,
+                                 profile=self.profile, mode=self.mode)
+        else:
+            cards = self.generator.generate_flashcards(document, "General", "Mixed", self.num_cards,
+                                                       profile=self.profile, mode=self.mode)
+        return len(cards)
+
+    def run(self) -> Dict[str, Any]:
+        """Run every request and return throughput, latency, queueing and memory figures"""
+        jobs = queue.Queue()
+        results: List[Dict[str, Any]] = []
+        results_lock = threading.Lock()
+        kinds = self._request_kinds()
+        documents = [make_document(kind, self.rng) for kind in kinds]
+        sampler = _MemorySampler()
+
+        def session():
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                kind, document, arrival = job
+                started = time.time()
+                record = {'kind': kind, 'queue_s': started - (arrival or started)}
+                try:
+                    record['cards'] = self._run_request(kind, document)
+                except Exception as e:
+                    record['error'] = str(e)
+                record['latency_s'] = time.time() - started
+                with results_lock:
+                    results.append(record)
+
+        started = time.time()
+        workers = [threading.Thread(target=session, name=f"session-{i}", daemon=True) for i in range(self.sessions)]
+        for worker in workers:
+            worker.start()
+
+        arrival = started
+        for kind, document in zip(kinds, documents):
+            if self.arrival_rate:
+                arrival += self.rng.expovariate(self.arrival_rate)
+                time.sleep(max(0.0, arrival - time.time()))
+                jobs.put((kind, document, arrival))
+            else:
+                jobs.put((kind, document, None))
+        for _ in workers:
+            jobs.put(None)
+        for worker in workers:
+            worker.join()
+
+        elapsed = time.time() - started
+        sampler.stop()
+        return self._report(results, elapsed, sampler)
+
+    def _report(self, results: List[Dict[str, Any]], elapsed: float, sampler: _MemorySampler) -> Dict[str, Any]:
+        completed = [r for r in results if 'error' not in r]
+        report = {
+            'sessions': self.sessions,
+            'requests': len(results),
+            'errors': len(results) - len(completed),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(len(completed) / elapsed, 3) if elapsed else 0.0,
+            'cards_per_s': round(sum(r['cards'] for r in completed) / elapsed, 3) if elapsed else 0.0,
+            'latency_s': summarize([r['latency_s'] for r in completed]),
+            'queue_s': summarize([r['queue_s'] for r in results]),
+            'latency_by_kind_s': {
+                kind: summarize([r['latency_s'] for r in completed if r['kind'] == kind])
+                for kind in sorted({r['kind'] for r in completed})
+            },
+            'rss_start_mb': round(sampler.start_mb, 1),
+            'rss_peak_mb': round(sampler.peak_mb, 1),
+            'schedulers': {},
+        }
+        if self.generator.model_available:
+            report['tier_stats'] = self.generator.get_tier_stats()
+            # Time prompts spent waiting for a batch inside each model's scheduler
+            for name in self.generator.tiers:
+                with self.generator.lifecycle.use(name) as tier:
+                    if tier is not None:
+                        stats = tier.scheduler.get_stats()
+                        report['schedulers'][name] = {
+                            'requests': stats['requests'],
+                            'avg_batch_size': round(stats['avg_batch_size'], 2),
+                            'avg_queue_wait_ms': round(stats['avg_queue_wait_ms'], 1),
+                        }
+        return report
+
+
+def print_report(report: Dict[str, Any]):
+    latency = report['latency_s']
+    queueing = report['queue_s']
+    print(f"Sessions: {report['sessions']}  Requests: {report['requests']}  Errors: {report['errors']}")
+    print(f"Elapsed: {report['elapsed_s']}s  Throughput: {report['throughput_rps']} req/s, "
+          f"{report['cards_per_s']} cards/s")
+    print(f"Latency  p50 {latency['p50']}s  p95 {latency['p95']}s  p99 {latency['p99']}s  max {latency['max']}s")
+    print(f"Queueing p50 {queueing['p50']}s  p95 {queueing['p95']}s  p99 {queueing['p99']}s")
+    for kind, stats in report['latency_by_kind_s'].items():
+        print(f"  {kind:<8} p50 {stats['p50']}s  p95 {stats['p95']}s")
+    for name, stats in report['schedulers'].items():
+        print(f"Scheduler {name}: avg batch {stats['avg_batch_size']}, avg queue wait {stats['avg_queue_wait_ms']} ms")
+    print(f"RSS: {report['rss_start_mb']} MB at start, {report['rss_peak_mb']} MB peak")
+
+
+def build_generator(args) -> FlashcardGenerator:
+    common = dict(max_batch_size=args.max_batch_size, batch_wait_ms=args.batch_wait_ms, preload_languages=False)
+    if args.backend == "stub":
+        return StubFlashcardGenerator(stub_batch_ms=args.stub_batch_ms, stub_prompt_ms=args.stub_prompt_ms, **common)
+    if args.backend == "rules":
+        return FlashcardGenerator(model_names=[], **common)
+    return FlashcardGenerator(model_names=[args.model_name], **common)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline load test for flashcard generation")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent simulated sessions")
+    parser.add_argument("--requests-per-session", type=int, default=5)
+    parser.add_argument("--mix", default="short=3,long=1,upload=1",
+                        help="Document kinds and weights (short, long, upload)")
+    parser.add_argument("--num-cards", type=int, default=15)
+    parser.add_argument("--backend", choices=["stub", "rules", "hf"], default="stub",
+                        help="stub: simulated model; rules: rule-based engine; hf: a local Hugging Face model")
+    parser.add_argument("--model-name", default="google/flan-t5-small", help="Model for the hf backend")
+    parser.add_argument("--profile", choices=list(GENERATION_PROFILES), default=DEFAULT_PROFILE)
+    parser.add_argument("--arrival-rate", type=float, help="Open-loop arrivals per second instead of closed-loop sessions")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--batch-wait-ms", type=float, default=50.0)
+    parser.add_argument("--stub-batch-ms", type=float, default=40.0, help="Stub model cost per batch")
+    parser.add_argument("--stub-prompt-ms", type=float, default=10.0, help="Stub model cost per prompt")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--max-p95-s", type=float, help="Exit with status 1 if p95 latency exceeds this")
+    args = parser.parse_args(argv)
+
+    generator = build_generator(args)
+    load_test = LoadTest(
+        generator,
+        sessions=args.sessions,
+        requests_per_session=args.requests_per_session,
+        mix=parse_mix(args.mix),
+        num_cards=args.num_cards,
+        mode="rules" if args.backend == "rules" else "llm",
+        profile=args.profile,
+        arrival_rate=args.arrival_rate,
+        seed=args.seed
+    )
+    report = load_test.run()
+    generator.lifecycle.shutdown()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if report['errors']:
+        return 1
+    if args.max_p95_s is not None and report['latency_s']['p95'] > args.max_p95_s:
+        print(f"p95 latency {report['latency_s']['p95']}s exceeds {args.max_p95_s}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import time
+from typing import List, Optional
+
+MANIFEST_FILE = "artifact.json"
+WARMUP_FILE = "warmup_prompts.json"
+
+# Representative prompts in the generator's format, run once at startup so the
+# first user does not pay for lazy initialisation inside the model
+DEFAULT_WARMUP_PROMPTS = [
+    """Based on the following educational content about key concepts and important information, Create a simple, straightforward question that tests basic understanding.
+
+Content: Photosynthesis is the process by which green plants use sunlight to make glucose from carbon dioxide and water.
+
+Generate one clear question and its complete answer. Format your response as:
+Question: [Your question here]
+Answer: [Your detailed answer here]""",
+    """Based on the following educational content about historical events, dates, people, and causes, Create a question that requires some analysis and understanding.
+
+Content: The printing press, developed by Johannes Gutenberg around 1440, made books cheaper and spread literacy across Europe.
+
+Generate one clear question and its complete answer. Format your response as:
+Question: [Your question here]
+Answer: [Your detailed answer here]""",
+]
+
+
+def artifact_path(artifact_root: str, model_name: str) -> str:
+    """Directory holding the prepared artifact for ``model_name``"""
+    return os.path.join(artifact_root, model_name.replace('/', '--'))
+
+
+def process_start_time() -> float:
+    """Wall-clock time this process started, from /proc when available"""
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces, so split after its closing paren
+            fields = f.read().rsplit(')', 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return _IMPORT_TIME
+
+
+_IMPORT_TIME = time.time()
+
+
+def prepare_artifact(model_name: str, artifact_root: str, warmup_prompts: Optional[List[str]] = None) -> str:
+    """Save safetensors weights, a fast tokenizer and warm-up prompts for ``model_name``"""
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    output_dir = artifact_path(artifact_root, model_name)
+    os.makedirs(output_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.save_pretrained(output_dir, safe_serialization=True)
+    # Writes tokenizer.json, so loading skips the slow sentencepiece conversion
+    tokenizer.save_pretrained(output_dir)
+
+    with open(os.path.join(output_dir, WARMUP_FILE), 'w', encoding='utf-8') as f:
+        json.dump(warmup_prompts or DEFAULT_WARMUP_PROMPTS, f, indent=2, ensure_ascii=False)
+
+    manifest = {
+        'model_name': model_name,
+        'created_at': time.time(),
+        'format': 'safetensors',
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    return output_dir
+
+
+def find_artifact(artifact_root: Optional[str], model_name: str) -> Optional[str]:
+    """Prepared artifact directory for the model, or None if there is none"""
+    if not artifact_root:
+        return None
+    path = artifact_path(artifact_root, model_name)
+    return path if os.path.exists(os.path.join(path, MANIFEST_FILE)) else None
+
+
+def load_warmup_prompts(artifact_dir: Optional[str]) -> List[str]:
+    """Warm-up prompts recorded with the artifact, or the defaults"""
+    if artifact_dir:
+        try:
+            with open(os.path.join(artifact_dir, WARMUP_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return list(DEFAULT_WARMUP_PROMPTS)
+
+
+def _safetensors_files(artifact_dir: str) -> List[str]:
+    index_file = os.path.join(artifact_dir, "model.safetensors.index.json")
+    if os.path.exists(index_file):
+        with open(index_file, encoding='utf-8') as f:
+            shards = sorted(set(json.load(f)['weight_map'].values()))
+        return [os.path.join(artifact_dir, shard) for shard in shards]
+    return [os.path.join(artifact_dir, "model.safetensors")]
+
+
+def load_mmap_model(artifact_dir: str):
+    """Build the model on the meta device and point its weights at memory-mapped safetensors.
+
+    safetensors maps the file copy-on-write, and assign=True keeps those
+    tensors instead of copying them into freshly allocated parameters, so
+    worker processes loading the same artifact share weight pages through
+    the page cache. CPU and float32 weights only.
+    """
+    import torch
+    from safetensors.torch import load_file
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM
+
+    config = AutoConfig.from_pretrained(artifact_dir)
+    with torch.device("meta"):
+        model = AutoModelForSeq2SeqLM.from_config(config)
+
+    state_dict = {}
+    for path in _safetensors_files(artifact_dir):
+        state_dict.update(load_file(path, device="cpu"))
+
+    # Tied embeddings are stored once; tie_weights re-links the other copies
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+
+    missing = [name for name, param in model.named_parameters() if param.is_meta]
+    if missing:
+        raise ValueError(f"Artifact is missing weights: {', '.join(missing[:5])}")
+
+    return model.eval()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare local model artifacts for fast startup")
+    parser.add_argument("models", nargs="+", help="Hugging Face model names, e.g. google/flan-t5-base")
+    parser.add_argument("--output", default="artifacts", help="Artifact root directory")
+    parser.add_argument("--warmup-file", help="JSON list of warm-up prompts to record")
+    args = parser.parse_args()
+
+    warmup_prompts = None
+    if args.warmup_file:
+        with open(args.warmup_file, encoding='utf-8') as f:
+            warmup_prompts = json.load(f)
+
+    for model_name in args.models:
+        path = prepare_artifact(model_name, args.output, warmup_prompts)
+        print(f"Prepared {model_name} in {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import re
+import threading
+from typing import Dict, Any
+
+# Local seq2seq models, cheapest first. Requests start at the tier picked by
+# the router and escalate up the list when the output is unusable.
+DEFAULT_CASCADE = ["google/flan-t5-small", "google/flan-t5-base"]
+
+# Highest complexity each difficulty may have before skipping the small tier;
+# None always starts on the last (most capable) tier
+COMPLEXITY_LIMITS = {
+    "Easy": 0.75,
+    "Medium": 0.5,
+    "Hard": None,
+}
+
+
+class ModelTier:
+    """One loaded model of the cascade and everything needed to call it"""
+
+    def __init__(self, name: str, generator, tokenizer, scheduler, generation_kwargs: Dict[str, Dict[str, Any]]):
+        self.name = name
+        self.generator = generator
+        self.tokenizer = tokenizer
+        self.scheduler = scheduler
+        self.generation_kwargs = generation_kwargs
+
+
+class CascadeRouter:
+    """Picks the starting tier from difficulty and chunk complexity, and counts who served each card"""
+
+    _sentence_end = re.compile(r'[.!?]+')
+
+    def __init__(self, complexity_limits: Dict[str, float] = None):
+        self.complexity_limits = complexity_limits or COMPLEXITY_LIMITS
+        self._lock = threading.Lock()
+        self._served: Dict[str, int] = {}
+        self._escalations = 0
+
+    def complexity(self, text: str) -> float:
+        """Cheap 0-1 estimate from average word and sentence length"""
+        words = text.split()
+        if not words:
+            return 0.0
+
+        num_sentences = max(1, len(self._sentence_end.findall(text)))
+        avg_word_length = sum(len(word) for word in words) / len(words)
+        avg_sentence_length = len(words) / num_sentences
+
+        word_score = (avg_word_length - 4) / 4
+        sentence_score = (avg_sentence_length - 10) / 30
+        return min(1.0, max(0.0, 0.5 * word_score + 0.5 * sentence_score))
+
+    def route(self, difficulty: str, text: str, num_tiers: int) -> int:
+        """Index of the tier to try first"""
+        if num_tiers <= 1:
+            return 0
+
+        limit = self.complexity_limits.get(difficulty, self.complexity_limits["Medium"])
+        if limit is not None and self.complexity(text) <= limit:
+            return 0
+        return num_tiers - 1
+
+    def record(self, tier_name: str, escalated: bool = False):
+        """Count a card as served by ``tier_name``"""
+        with self._lock:
+            self._served[tier_name] = self._served.get(tier_name, 0) + 1
+            if escalated:
+                self._escalations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cards served per tier and each tier's share of the total"""
+        with self._lock:
+            served = dict(self._served)
+            escalations = self._escalations
+
+        total = sum(served.values())
+        return {
+            'total_cards': total,
+            'escalations': escalations,
+            'tiers': {
+                name: {'cards': count, 'share': count / total if total else 0.0}
+                for name, count in served.items()
+            }
+        }
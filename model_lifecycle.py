@@ -0,0 +1,222 @@
+import gc
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, Optional
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        # Not Linux: fall back to the peak RSS, which is what getrusage reports
+        import resource
+    except ImportError:
+        # Windows has neither; report nothing, which also disables watermark eviction
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class _ManagedModel:
+    __slots__ = ('handle', 'last_used', 'in_use', 'loaded_at')
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.last_used = time.time()
+        self.in_use = 0
+        self.loaded_at = self.last_used
+
+
+class ModelLifecycleManager:
+    """Loads models on demand and unloads them when idle or when memory runs high.
+
+    ``loader(name)`` returns a loaded model handle (or None on failure). A
+    background reaper unloads models unused for ``idle_timeout_s`` and, when
+    process RSS exceeds ``rss_watermark_mb``, evicts least-recently-used models
+    until it is back under the watermark. Models in use are never evicted;
+    the next request for an evicted model reloads it transparently. Every load
+    and unload is recorded as an event for capacity planning.
+    """
+
+    def __init__(self, loader: Callable[[str], Any], idle_timeout_s: Optional[float] = 1800.0,
+                 rss_watermark_mb: Optional[float] = None, check_interval_s: float = 30.0,
+                 max_events: int = 1000):
+        self.loader = loader
+        self.idle_timeout_s = idle_timeout_s
+        self.rss_watermark_mb = rss_watermark_mb
+        self.check_interval_s = check_interval_s
+
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._models: Dict[str, _ManagedModel] = {}
+        self._events = deque(maxlen=max_events)
+        self._stop = threading.Event()
+
+        self._reaper = None
+        if idle_timeout_s is not None or rss_watermark_mb is not None:
+            self._reaper = threading.Thread(target=self._reap_loop, name="model-reaper", daemon=True)
+            self._reaper.start()
+
+    def _record(self, event: str, name: str, **details):
+        entry = {'time': time.time(), 'event': event, 'model': name, 'rss_mb': round(current_rss_mb(), 1)}
+        entry.update(details)
+        self._events.append(entry)
+
+    def _acquire(self, name: str, hold: bool = True) -> Optional[_ManagedModel]:
+        """Return the loaded model, loading it once even if several threads ask at the same time.
+
+        With ``hold`` the model is marked in use before the lock is released,
+        so the reaper cannot evict it between loading and use.
+        """
+        with self._lock:
+            managed = self._models.get(name)
+            if managed is not None:
+                managed.in_use += int(hold)
+                return managed
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                managed = self._models.get(name)
+                if managed is not None:
+                    managed.in_use += int(hold)
+                    return managed
+
+            started = time.time()
+            handle = self.loader(name)
+            duration = time.time() - started
+            if handle is None:
+                self._record('load_failed', name, duration_s=round(duration, 3))
+                return None
+
+            managed = _ManagedModel(handle)
+            managed.in_use += int(hold)
+            with self._lock:
+                self._models[name] = managed
+            self._record('load', name, duration_s=round(duration, 3))
+            return managed
+
+    def load(self, name: str) -> bool:
+        """Load a model ahead of its first request; False if loading failed"""
+        return self._acquire(name, hold=False) is not None
+
+    @contextmanager
+    def use(self, name: str):
+        """Yield the loaded model handle (reloading it if evicted), or None if it cannot load"""
+        managed = self._acquire(name)
+        if managed is None:
+            yield None
+            return
+
+        try:
+            yield managed.handle
+        finally:
+            with self._lock:
+                managed.in_use -= 1
+                managed.last_used = time.time()
+
+    def unload(self, name: str, reason: str = "manual") -> bool:
+        """Unload a model unless it is serving a request"""
+        with self._lock:
+            managed = self._models.get(name)
+            if managed is None or managed.in_use:
+                return False
+            del self._models[name]
+
+        idle = time.time() - managed.last_used
+        scheduler = getattr(managed.handle, 'scheduler', None)
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+        managed.handle = None
+        del managed
+        gc.collect()
+        self._free_accelerator_memory()
+
+        self._record('unload', name, reason=reason, idle_s=round(idle, 1))
+        return True
+
+    @staticmethod
+    def _free_accelerator_memory():
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def evict_idle(self) -> List[str]:
+        """Unload every model idle for longer than the idle timeout"""
+        if self.idle_timeout_s is None:
+            return []
+
+        now = time.time()
+        with self._lock:
+            idle = [name for name, managed in self._models.items()
+                    if not managed.in_use and now - managed.last_used >= self.idle_timeout_s]
+        return [name for name in idle if self.unload(name, reason="idle")]
+
+    def enforce_watermark(self) -> List[str]:
+        """Evict least-recently-used models while RSS is above the watermark"""
+        if self.rss_watermark_mb is None:
+            return []
+
+        evicted = []
+        while current_rss_mb() > self.rss_watermark_mb:
+            with self._lock:
+                candidates = sorted(
+                    (managed.last_used, name) for name, managed in self._models.items() if not managed.in_use
+                )
+            if not candidates:
+                break
+            name = candidates[0][1]
+            if self.unload(name, reason="rss_watermark"):
+                evicted.append(name)
+        return evicted
+
+    def _reap_loop(self):
+        while not self._stop.wait(self.check_interval_s):
+            try:
+                self.evict_idle()
+                self.enforce_watermark()
+            except Exception as e:
+                print(f"Warning: Model eviction check failed: {e}")
+
+    def shutdown(self):
+        """Stop the reaper and unload all idle models"""
+        self._stop.set()
+        with self._lock:
+            names = list(self._models)
+        for name in names:
+            self.unload(name, reason="shutdown")
+
+    def get_events(self) -> List[Dict[str, Any]]:
+        """Recorded load and unload events, oldest first"""
+        return list(self._events)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Currently loaded models and process memory"""
+        now = time.time()
+        with self._lock:
+            models = {
+                name: {
+                    'idle_s': round(now - managed.last_used, 1),
+                    'in_use': managed.in_use,
+                    'loaded_for_s': round(now - managed.loaded_at, 1)
+                }
+                for name, managed in self._models.items()
+            }
+        return {
+            'loaded_models': models,
+            'rss_mb': round(current_rss_mb(), 1),
+            'rss_watermark_mb': self.rss_watermark_mb,
+            'idle_timeout_s': self.idle_timeout_s
+        }
@@ -0,0 +1,132 @@
+import threading
+from typing import List, Dict, Iterable, Optional, FrozenSet
+import nltk
+
+# Languages offered by the app, mapped to NLTK's punkt/stopwords resource names
+SUPPORTED_LANGUAGES = {
+    "English": "english",
+    "Spanish": "spanish",
+    "French": "french",
+    "German": "german",
+    "Italian": "italian",
+}
+
+DEFAULT_LANGUAGE = "English"
+
+NLTK_PACKAGES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+}
+
+
+class NLPResources:
+    """Loads punkt tokenizers and stopword sets once per language, on first use.
+
+    NLTK data is only probed (and downloaded if missing) the first time a
+    resource is needed, not at import time.
+    """
+
+    def __init__(self, download_missing: bool = True):
+        self.download_missing = download_missing
+        self._lock = threading.RLock()
+        self._packages_checked = False
+        self._tokenizers: Dict[str, object] = {}
+        self._stopwords: Dict[str, FrozenSet[str]] = {}
+
+    @staticmethod
+    def language_code(language: Optional[str]) -> str:
+        """NLTK resource name for an app language name such as "Spanish" """
+        if not language:
+            return SUPPORTED_LANGUAGES[DEFAULT_LANGUAGE]
+        return SUPPORTED_LANGUAGES.get(language, language.lower())
+
+    def _ensure_packages(self):
+        if self._packages_checked:
+            return
+        with self._lock:
+            if self._packages_checked:
+                return
+            for package, path in NLTK_PACKAGES.items():
+                try:
+                    nltk.data.find(path)
+                except LookupError:
+                    if self.download_missing:
+                        nltk.download(package, quiet=True)
+            self._packages_checked = True
+
+    def tokenizer(self, language: Optional[str] = None):
+        """Punkt sentence tokenizer for the language, English if unavailable"""
+        code = self.language_code(language)
+        tokenizer = self._tokenizers.get(code)
+        if tokenizer is not None:
+            return tokenizer
+
+        self._ensure_packages()
+        with self._lock:
+            tokenizer = self._tokenizers.get(code)
+            if tokenizer is None:
+                try:
+                    tokenizer = nltk.data.load(f'tokenizers/punkt/{code}.pickle')
+                except LookupError:
+                    if code == SUPPORTED_LANGUAGES[DEFAULT_LANGUAGE]:
+                        raise
+                    tokenizer = self.tokenizer(DEFAULT_LANGUAGE)
+                self._tokenizers[code] = tokenizer
+        return tokenizer
+
+    def stopwords(self, language: Optional[str] = None) -> FrozenSet[str]:
+        """Stopword set for the language, empty if NLTK has none for it"""
+        code = self.language_code(language)
+        words = self._stopwords.get(code)
+        if words is not None:
+            return words
+
+        self._ensure_packages()
+        with self._lock:
+            words = self._stopwords.get(code)
+            if words is None:
+                try:
+                    from nltk.corpus import stopwords
+                    words = frozenset(stopwords.words(code))
+                except (LookupError, OSError):
+                    words = frozenset()
+                self._stopwords[code] = words
+        return words
+
+    def sent_tokenize(self, text: str, language: Optional[str] = None) -> List[str]:
+        """Split text into sentences with the language's cached punkt model"""
+        return self.tokenizer(language).tokenize(text)
+
+    def preload(self, languages: Iterable[str] = SUPPORTED_LANGUAGES, background: bool = True):
+        """Load tokenizers and stopwords for ``languages``, optionally in a daemon thread"""
+        languages = list(languages)
+
+        def load_all():
+            for language in languages:
+                try:
+                    self.tokenizer(language)
+                    self.stopwords(language)
+                except Exception as e:
+                    print(f"Warning: Could not preload NLP resources for {language}: {e}")
+
+        if not background:
+            load_all()
+            return None
+
+        thread = threading.Thread(target=load_all, name="nlp-preload", daemon=True)
+        thread.start()
+        return thread
+
+
+_shared_resources = None
+_shared_lock = threading.Lock()
+
+
+def get_nlp_resources() -> NLPResources:
+    """Process-wide resource manager so every component shares one cache"""
+    global _shared_resources
+    if _shared_resources is None:
+        with _shared_lock:
+            if _shared_resources is None:
+                _shared_resources = NLPResources()
+    return _shared_resources
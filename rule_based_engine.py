@@ -0,0 +1,200 @@
+import re
+import random
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+from nlp_resources import NLPResources, get_nlp_resources
+from section_index import PAGE_MARKER, body_start, is_heading
+
+DIFFICULTY_LEVELS = ["Easy", "Medium", "Hard"]
+
+# Questions about the sentence's main subject
+SUBJECT_TEMPLATES = [
+    "What is mentioned about {subject}?",
+    "Explain the concept related to {subject}.",
+    "What are the key points about {subject}?",
+    "Describe {subject}.",
+]
+
+# Questions that work for any sentence
+GENERIC_TEMPLATES = [
+    "What is the main idea presented in this content?",
+    "What are the important details mentioned?",
+    "How would you summarize this information?",
+]
+
+SENTENCE_TEMPLATES = SUBJECT_TEMPLATES + GENERIC_TEMPLATES
+
+# Words from page markers rather than the content itself
+NON_SUBJECTS = frozenset({'page'})
+
+CONCEPT_TEMPLATES = [
+    "What is {concept}?",
+    "Define {concept}.",
+    "Explain the significance of {concept}.",
+    "What are the key characteristics of {concept}?",
+]
+
+
+class DocumentAnalysis:
+    """Per-document data computed once and reused for every card"""
+
+    def __init__(self, sentences: List[str], offsets: List[int], subjects: List[Optional[str]],
+                 key_concepts: List[str], concept_sentences: Dict[str, int],
+                 scores: List[int]):
+        self.sentences = sentences
+        self.offsets = offsets
+        self.subjects = subjects
+        self.key_concepts = key_concepts
+        self.concept_sentences = concept_sentences
+        self.scores = scores
+
+
+class RuleBasedEngine:
+    """Template-based flashcard engine that needs no model.
+
+    A document is tokenized once; subjects, key concepts and sentence scores
+    are then computed in whole-document passes, so generating thousands of
+    cards only costs template formatting.
+    """
+
+    # Purely alphabetic words longer than 3 letters; the first one in a
+    # sentence is taken as its main subject
+    _word_pattern = re.compile(r'\b[^\W\d_]{4,}\b')
+
+    def __init__(self, max_concepts: int = 20, min_sentence_length: int = 20,
+                 nlp: Optional[NLPResources] = None):
+        self.max_concepts = max_concepts
+        self.min_sentence_length = min_sentence_length
+        self.nlp = nlp or get_nlp_resources()
+
+    def extract_key_concepts(self, text: str, language: str = "English") -> List[str]:
+        """Most frequent non-stopword terms in the text"""
+        stop_words = self.nlp.stopwords(language)
+        counts = Counter(word for word in self._word_pattern.findall(text.lower())
+                         if word not in stop_words and word not in NON_SUBJECTS)
+        return [word for word, _ in counts.most_common(self.max_concepts)]
+
+    @staticmethod
+    def _body(sentence: str) -> Tuple[int, str]:
+        """Sentence without the page markers and headings punkt joined onto it, and where it starts"""
+        start = body_start(sentence)
+        body = sentence[start:]
+        start += len(body) - len(body.lstrip())
+        body = body.strip()
+        if PAGE_MARKER.match(body) or is_heading(body):
+            return start, ""
+        return start, body
+
+    def _subject(self, sentence: str) -> Optional[str]:
+        """First content word of a sentence"""
+        for match in self._word_pattern.finditer(sentence):
+            if match.group(0).lower() not in NON_SUBJECTS:
+                return match.group(0)
+        return None
+
+    def analyze(self, content: str, language: str = "English",
+                sentences: Optional[List[str]] = None) -> DocumentAnalysis:
+        """Tokenize the document once and derive everything card generation needs"""
+        if sentences is None:
+            sentences = self.nlp.sent_tokenize(content, language)
+        key_concepts = self.extract_key_concepts(content, language)
+
+        bodies = []
+        offsets = []
+        subjects = []
+        scores = []
+        concept_sentences = {}
+        position = 0
+        for sentence in (s.strip() for s in sentences):
+            if not sentence:
+                continue
+            # Sentences appear in document order, so each search resumes where the last ended
+            found = content.find(sentence, position)
+            if found >= 0:
+                position = found + len(sentence)
+            start, sentence = self._body(sentence)
+            if not sentence:
+                continue
+            i = len(bodies)
+            bodies.append(sentence)
+            offsets.append(found + start if found >= 0 else position)
+            subjects.append(self._subject(sentence))
+
+            lowered = sentence.lower()
+            score = 0
+            for concept in key_concepts:
+                if concept in lowered:
+                    score += 1
+                    concept_sentences.setdefault(concept, i)
+            scores.append(score)
+
+        return DocumentAnalysis(bodies, offsets, subjects, key_concepts, concept_sentences, scores)
+
+    def _pick_difficulty(self, difficulty: str, rng) -> str:
+        return rng.choice(DIFFICULTY_LEVELS) if difficulty == "Mixed" else difficulty
+
+    def _sentence_card(self, sentence: str, subject: Optional[str], difficulty: str, rng) -> Dict[str, str]:
+        # Pick the template before formatting so only one string is built
+        template = rng.choice(SENTENCE_TEMPLATES)
+        return {
+            'question': template.format(subject=subject or "the topic"),
+            'answer': sentence,
+            'difficulty': difficulty
+        }
+
+    def concept_card(self, analysis: DocumentAnalysis, subject: str, difficulty: str,
+                     rng=random) -> Optional[Dict[str, str]]:
+        """Card asking about a randomly chosen key concept of the document"""
+        if not analysis.key_concepts:
+            return None
+
+        concept = rng.choice(analysis.key_concepts)
+        card = {
+            'question': rng.choice(CONCEPT_TEMPLATES).format(concept=concept),
+            'answer': f"A key concept related to {subject}.",
+            'difficulty': self._pick_difficulty(difficulty, rng)
+        }
+
+        sentence_index = analysis.concept_sentences.get(concept)
+        if sentence_index is not None:
+            card['answer'] = analysis.sentences[sentence_index]
+            card['offset'] = analysis.offsets[sentence_index]
+        return card
+
+    def generate_from_chunk(self, text: str, difficulty: str, language: str = "English",
+                            rng=random) -> Optional[Dict[str, str]]:
+        """Single card from one chunk, used when the LLM is unavailable or fails"""
+        sentences = [body for _, body in map(self._body, self.nlp.sent_tokenize(text, language)) if body]
+        if not sentences:
+            return None
+
+        key_sentence = rng.choice(sentences[:min(10, len(sentences))])
+        return self._sentence_card(key_sentence, self._subject(key_sentence), difficulty, rng)
+
+    def generate(self, content: str, subject: str, difficulty: str, num_cards: int,
+                 analysis: Optional[DocumentAnalysis] = None, language: str = "English",
+                 rng=random) -> List[Dict[str, Any]]:
+        """Generate up to ``num_cards`` Q&A pairs for a whole document"""
+        if analysis is None:
+            analysis = self.analyze(content, language)
+
+        # Rank sentences by how many key concepts they mention, keep document order
+        candidates = [i for i, sentence in enumerate(analysis.sentences)
+                      if len(sentence) >= self.min_sentence_length]
+        candidates.sort(key=lambda i: analysis.scores[i], reverse=True)
+        selected = sorted(candidates[:num_cards])
+
+        cards = []
+        for i in selected:
+            card = self._sentence_card(analysis.sentences[i], analysis.subjects[i],
+                                       self._pick_difficulty(difficulty, rng), rng)
+            card['offset'] = analysis.offsets[i]
+            cards.append(card)
+
+        while len(cards) < num_cards:
+            card = self.concept_card(analysis, subject, difficulty, rng)
+            if card is None:
+                break
+            cards.append(card)
+
+        return cards
@@ -0,0 +1,83 @@
+import re
+from bisect import bisect_right
+from typing import List, Optional
+
+# Page separators inserted by FileProcessor._process_pdf_file
+PAGE_MARKER = re.compile(r'^--- Page (\d+) ---$')
+
+
+def is_heading(line: str) -> bool:
+    """Heuristic for heading-like lines: short, capitalized and without a trailing period"""
+    return (len(line) < 100 and
+            (line.isupper() or line.istitle()) and
+            not line.endswith('.') and
+            len(line.split()) <= 8)
+
+
+def body_start(text: str, start: int = 0, end: Optional[int] = None) -> int:
+    """Offset of the first body line in ``text[start:end]``.
+
+    Blank lines, page markers and headings at the start of the span are
+    skipped, so a topic looked up at the returned offset is the section the
+    span's body belongs to. A final line without a newline is never skipped.
+    """
+    end = len(text) if end is None else end
+    offset = start
+    while offset < end:
+        newline = text.find('\n', offset, end)
+        if newline < 0:
+            break
+        line = text[offset:newline].strip()
+        if line and not PAGE_MARKER.match(line) and not is_heading(line):
+            break
+        offset = newline + 1
+    return offset
+
+
+class SectionIndex:
+    """Offsets of headings and page markers in a document.
+
+    Built with one scan over the lines; the enclosing section of any
+    character offset is then found with a bisect over the sorted offsets.
+    """
+
+    def __init__(self, text: str):
+        self.heading_offsets: List[int] = []
+        self.headings: List[str] = []
+        self.page_offsets: List[int] = []
+        self.pages: List[int] = []
+
+        offset = 0
+        for raw_line in text.splitlines(keepends=True):
+            line = raw_line.strip()
+            if line:
+                page_match = PAGE_MARKER.match(line)
+                if page_match:
+                    self.page_offsets.append(offset)
+                    self.pages.append(int(page_match.group(1)))
+                elif is_heading(line):
+                    self.heading_offsets.append(offset)
+                    self.headings.append(line)
+            offset += len(raw_line)
+
+    @property
+    def has_headings(self) -> bool:
+        return bool(self.headings)
+
+    def heading_at(self, offset: int) -> Optional[str]:
+        """Closest heading at or before ``offset``"""
+        i = bisect_right(self.heading_offsets, offset) - 1
+        return self.headings[i] if i >= 0 else None
+
+    def page_at(self, offset: int) -> Optional[int]:
+        """Page number containing ``offset``, if the text has page markers"""
+        i = bisect_right(self.page_offsets, offset) - 1
+        return self.pages[i] if i >= 0 else None
+
+    def topic_at(self, offset: int) -> Optional[str]:
+        """Topic for text starting at ``offset``: its heading, else its page"""
+        heading = self.heading_at(offset)
+        if heading:
+            return heading
+        page = self.page_at(offset)
+        return f"Page {page}" if page is not None else None
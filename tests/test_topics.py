@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("nltk")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from flashcard_generator import FlashcardGenerator
+
+CONTENT = (
+    "\n--- Page 1 ---\nCell Biology\n"
+    "Cells are the basic unit of life. Every organism is made of one or more cells.\n"
+    "\n--- Page 2 ---\nGenetics\n"
+    "DNA stores genetic information. Genes are passed from parents to offspring.\n"
+)
+
+
+@pytest.fixture(scope="module")
+def generator():
+    return FlashcardGenerator(model_names=[], preload_languages=False)
+
+
+def test_first_chunk_gets_the_opening_heading(generator):
+    topic, chunk = generator.plan_chunks(CONTENT)[0]
+    assert topic == "Cell Biology"
+
+
+def test_chunk_starting_a_section_gets_its_heading(generator):
+    sections = generator._build_section_index(CONTENT)
+    # Small chunks so the second page starts a chunk of its own
+    chunks = generator._chunk_text_with_offsets(CONTENT, max_chunk_size=90)
+    topics = {chunk: sections.topic_at(offset) for offset, chunk in chunks}
+    assert [topic for chunk, topic in topics.items() if "DNA" in chunk] == ["Genetics"]
@@ -1,8 +1,19 @@
 import re
 import string
 from typing import List, Dict, Any
-import nltk
 from collections import Counter
+import numpy as np
+import pandas as pd
+from nlp_resources import get_nlp_resources
+
+KEYWORD_STOP_WORDS = frozenset({
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before',
+    'after', 'above', 'below', 'between', 'among', 'this', 'that', 'these',
+    'those', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have',
+    'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+    'may', 'might', 'must', 'can', 'shall', 'not', 'no', 'yes'
+})
 
 class TextUtils:
     @staticmethod
@@ -17,10 +28,10 @@ class TextUtils:
         return text.strip()
     
     @staticmethod
-    def extract_sentences(text: str, min_length: int = 10) -> List[str]:
+    def extract_sentences(text: str, min_length: int = 10, language: str = "English") -> List[str]:
         """Extract sentences from text with minimum length filter"""
         try:
-            sentences = nltk.sent_tokenize(text)
+            sentences = get_nlp_resources().sent_tokenize(text, language)
         except:
             # Fallback sentence splitting
             sentences = re.split(r'[.!?]+', text)
@@ -42,21 +53,8 @@ class TextUtils:
         if not text:
             return 0
         
-        sentences = TextUtils.extract_sentences(text)
-        words = text.split()
-        
-        if not sentences or not words:
-            return 0
-        
-        # Simple metrics
-        avg_sentence_length = len(words) / len(sentences)
-        avg_word_length = sum(len(word.strip(string.punctuation)) for word in words) / len(words)
-        
-        # Simple readability calculation (inverse of complexity)
-        complexity = (avg_sentence_length * 0.5) + (avg_word_length * 2)
-        readability = max(0, 100 - complexity * 2)
-        
-        return min(100, readability)
+        # Sentences and words come from one tokenization pass
+        return TextAnalyzer().analyze(text)['readability']
     
     @staticmethod
     def extract_keywords(text: str, num_keywords: int = 10) -> List[str]:
@@ -65,16 +63,7 @@ class TextUtils:
         words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
         
         # Remove common stop words
-        stop_words = {
-            'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-            'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before',
-            'after', 'above', 'below', 'between', 'among', 'this', 'that', 'these',
-            'those', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have',
-            'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
-            'may', 'might', 'must', 'can', 'shall', 'not', 'no', 'yes'
-        }
-        
-        filtered_words = [word for word in words if word not in stop_words and len(word) > 3]
+        filtered_words = [word for word in words if word not in KEYWORD_STOP_WORDS and len(word) > 3]
         
         # Count frequency
         word_counts = Counter(filtered_words)
@@ -82,6 +71,129 @@ class TextUtils:
         # Return top keywords
         return [word for word, count in word_counts.most_common(num_keywords)]
 
+class TextAnalyzer:
+    """Computes every TextUtils statistic from a single tokenization pass.
+
+    The text is split into sentences once; each sentence is then scanned once
+    for words, word lengths and keywords, and the cleaned text is rebuilt
+    from those words. The statistics follow the same rules as TextUtils.
+    """
+    
+    _keyword_pattern = re.compile(r'\b[a-zA-Z]{3,}\b')
+    
+    def __init__(self, language: str = "English", min_sentence_length: int = 10, num_keywords: int = 10):
+        self.language = language
+        self.min_sentence_length = min_sentence_length
+        self.num_keywords = num_keywords
+    
+    def _tokenize(self, text: str) -> List[str]:
+        try:
+            return get_nlp_resources().sent_tokenize(text, self.language)
+        except Exception:
+            # Fallback sentence splitting
+            return re.split(r'[.!?]+', text)
+    
+    def analyze(self, text: str) -> Dict[str, Any]:
+        """Return sentences, counts, keywords, readability and cleaned text for one document"""
+        sentences = []
+        all_words = []
+        word_count = 0
+        word_length_total = 0
+        keyword_counts = Counter()
+        
+        for sentence in self._tokenize(text):
+            words = sentence.split()
+            all_words.extend(words)
+            word_count += len(words)
+            word_length_total += sum(len(word.strip(string.punctuation)) for word in words)
+            keyword_counts.update(word for word in self._keyword_pattern.findall(sentence.lower())
+                                  if len(word) > 3 and word not in KEYWORD_STOP_WORDS)
+            
+            sentence = sentence.strip()
+            if (len(sentence) >= self.min_sentence_length and
+                not sentence.isdigit() and
+                len(words) >= 3):
+                sentences.append(sentence)
+        
+        return {
+            'sentences': sentences,
+            'sentence_count': len(sentences),
+            'word_count': word_count,
+            'keyword_counts': keyword_counts,
+            'keywords': [word for word, count in keyword_counts.most_common(self.num_keywords)],
+            'readability': self._readability(len(sentences), word_count, word_length_total),
+            # Same result as TextUtils.clean_text, reusing the words already split
+            'cleaned_text': ''.join(char for char in ' '.join(all_words) if char.isprintable()).strip()
+        }
+    
+    @staticmethod
+    def _readability(sentence_count: int, word_count: int, word_length_total: int) -> float:
+        """Same formula as TextUtils.calculate_readability_score"""
+        if not sentence_count or not word_count:
+            return 0
+        
+        avg_sentence_length = word_count / sentence_count
+        avg_word_length = word_length_total / word_count
+        complexity = (avg_sentence_length * 0.5) + (avg_word_length * 2)
+        return min(100, max(0, 100 - complexity * 2))
+    
+    def analyze_batch(self, texts: List[str]) -> Dict[str, Any]:
+        """Analyze many documents, plus corpus-wide totals and keyword counts.
+        
+        Each document is tokenized once; counting then runs on whole columns
+        of sentences and words rather than document by document.
+        """
+        index = pd.RangeIndex(len(texts))
+        # One row per sentence, indexed by its document
+        sentences = pd.Series(texts, index=index, dtype=object).map(self._tokenize).explode().dropna()
+        words = sentences.str.split()
+        
+        word_counts = words.str.len()
+        stripped = sentences.str.strip()
+        valid = ((stripped.str.len() >= self.min_sentence_length) &
+                 ~stripped.str.isdigit() &
+                 (word_counts >= 3))
+        word_lengths = words.explode().dropna().str.strip(string.punctuation).str.len()
+        
+        keywords = sentences.str.lower().str.findall(self._keyword_pattern).explode().dropna()
+        keywords = keywords[(keywords.str.len() > 3) & ~keywords.isin(KEYWORD_STOP_WORDS)]
+        # Count and first position of each keyword; ties are ranked by first occurrence,
+        # as Counter.most_common does in analyze()
+        occurrences = pd.DataFrame({
+            'document': keywords.index,
+            'word': keywords.to_numpy(),
+            'position': np.arange(len(keywords)),
+        })
+        keyword_counts = (occurrences.groupby(['document', 'word'], sort=False)['position']
+                          .agg(['size', 'min'])
+                          .sort_values(['size', 'min'], ascending=[False, True]))
+        
+        documents = pd.DataFrame({
+            'sentence_count': valid.groupby(level=0).sum(),
+            'word_count': word_counts.groupby(level=0).sum(),
+            'word_length_total': word_lengths.groupby(level=0).sum(),
+        }).reindex(index, fill_value=0).astype(int)
+        
+        # Same formula as _readability, over all documents at once
+        avg_sentence_length = documents['word_count'] / documents['sentence_count'].replace(0, np.nan)
+        avg_word_length = documents['word_length_total'] / documents['word_count'].replace(0, np.nan)
+        complexity = avg_sentence_length * 0.5 + avg_word_length * 2
+        documents['readability'] = (100 - complexity * 2).clip(0, 100).fillna(0)
+        top_keywords = (keyword_counts.groupby(level='document').head(self.num_keywords)
+                        .reset_index().groupby('document', sort=False)['word'].agg(list))
+        documents['keywords'] = [top_keywords.get(i, []) for i in index]
+        
+        corpus_keywords = (occurrences.groupby('word', sort=False)['position']
+                           .agg(['size', 'min'])
+                           .sort_values(['size', 'min'], ascending=[False, True])['size'])
+        return {
+            'documents': documents.drop(columns='word_length_total'),
+            'total_words': int(documents['word_count'].sum()),
+            'total_sentences': int(documents['sentence_count'].sum()),
+            'keyword_counts': Counter(corpus_keywords.to_dict()),
+            'keywords': list(corpus_keywords.index[:self.num_keywords])
+        }
+
 class ValidationUtils:
     @staticmethod
     def validate_flashcard(flashcard: Dict[str, Any]) -> List[str]:
@@ -142,8 +254,8 @@ class ValidationUtils:
                 validation_result['valid_cards'] += 1
         
         # Check for duplicates
-        questions = [card.get('question', '') for card in flashcards]
-        duplicates = [q for q in set(questions) if questions.count(q) > 1]
+        question_counts = Counter(card.get('question', '') for card in flashcards)
+        duplicates = [q for q, count in question_counts.items() if count > 1]
         if duplicates:
             validation_result['warnings'].append(f"Found {len(duplicates)} duplicate questions")
         
@@ -153,6 +265,169 @@ class ValidationUtils:
         
         return validation_result
 
+class BatchValidator:
+    """Column-wise flashcard validation for large decks.
+
+    Applies the ValidationUtils.validate_flashcard rules to whole columns at
+    once and finds duplicate questions by hash. Results are kept per card, so
+    after an edit only the changed cards are re-checked with update().
+    """
+    
+    CHECKS = [
+        "Question is required and cannot be empty",
+        "Answer is required and cannot be empty",
+        "Question should be in question format or start with an interrogative word",
+        "Question is too short (minimum 10 characters)",
+        "Answer is too short (minimum 5 characters)",
+        "Question is too long (maximum 200 characters)",
+        "Answer is too long (maximum 1000 characters)",
+    ]
+    
+    _interrogative_pattern = r'(?:What|How|Why|When|Where|Who|Which|Define|Explain|Describe)'
+    
+    def __init__(self, max_errors: int = 1000):
+        self.max_errors = max_errors
+        self._failures = pd.DataFrame(columns=range(len(self.CHECKS)), dtype=bool)
+        # Whether errors can name cards by id; otherwise they are numbered by position
+        self._by_id = False
+        self._question_hashes = pd.Series(dtype='uint64')
+        self._hash_counts = Counter()
+        self._duplicate_hashes = set()
+    
+    @staticmethod
+    def _frame(flashcards) -> pd.DataFrame:
+        """Question and answer columns keyed by card id (or position when cards have no id)"""
+        flashcards = list(flashcards)
+        index = None
+        if flashcards and all('id' in card for card in flashcards):
+            index = pd.Index([card['id'] for card in flashcards])
+        df = pd.DataFrame({
+            'question': [card.get('question') or '' for card in flashcards],
+            'answer': [card.get('answer') or '' for card in flashcards],
+        }, index=index, dtype=object)
+        return df.astype(str)
+    
+    def _check(self, df: pd.DataFrame) -> pd.DataFrame:
+        """One boolean column per rule in CHECKS, True where the card fails it"""
+        question = df['question']
+        answer = df['answer']
+        stripped_question = question.str.strip()
+        question_length = question.str.len()
+        answer_length = answer.str.len()
+        
+        checks = [
+            stripped_question == '',
+            answer.str.strip() == '',
+            (question != '') & ~stripped_question.str.endswith('?')
+                & ~question.str.match(self._interrogative_pattern),
+            question_length < 10,
+            answer_length < 5,
+            question_length > 200,
+            answer_length > 1000,
+        ]
+        return pd.concat(checks, axis=1, keys=range(len(self.CHECKS)))
+    
+    @staticmethod
+    def _hash(questions: pd.Series) -> pd.Series:
+        return pd.util.hash_pandas_object(questions, index=False)
+    
+    def _add_hashes(self, hashes: pd.Series):
+        for value in hashes:
+            self._hash_counts[value] += 1
+            if self._hash_counts[value] > 1:
+                self._duplicate_hashes.add(value)
+    
+    def _remove_hashes(self, hashes: pd.Series):
+        for value in hashes:
+            self._hash_counts[value] -= 1
+            if self._hash_counts[value] <= 1:
+                self._duplicate_hashes.discard(value)
+            if self._hash_counts[value] <= 0:
+                del self._hash_counts[value]
+    
+    def validate(self, flashcards) -> Dict[str, Any]:
+        """Validate a full deck, replacing any previous state"""
+        flashcards = list(flashcards)
+        df = self._frame(flashcards)
+        self._by_id = bool(flashcards) and all('id' in card for card in flashcards)
+        self._failures = self._check(df)
+        self._question_hashes = self._hash(df['question'])
+        self._question_hashes.index = df.index
+        
+        # Hash-based duplicate detection over the whole column
+        counts = self._question_hashes.value_counts()
+        self._hash_counts = Counter(counts.to_dict())
+        self._duplicate_hashes = set(counts.index[counts > 1])
+        return self.result()
+    
+    def update(self, changed_cards: List[Dict[str, Any]] = (), deleted_ids=()) -> Dict[str, Any]:
+        """Re-validate only edited or added cards and drop deleted ones"""
+        deleted = self._failures.index.intersection(list(deleted_ids))
+        if len(deleted):
+            self._remove_hashes(self._question_hashes.loc[deleted])
+            self._failures = self._failures.drop(deleted)
+            self._question_hashes = self._question_hashes.drop(deleted)
+        
+        if changed_cards:
+            df = self._frame(changed_cards)
+            existing = self._failures.index.intersection(df.index)
+            if len(existing):
+                self._remove_hashes(self._question_hashes.loc[existing])
+            
+            hashes = self._hash(df['question'])
+            hashes.index = df.index
+            self._add_hashes(hashes)
+            
+            failures = self._check(df)
+            new = df.index.difference(self._failures.index)
+            self._failures.loc[existing] = failures.loc[existing]
+            self._question_hashes.loc[existing] = hashes.loc[existing]
+            if len(new):
+                self._failures = pd.concat([self._failures, failures.loc[new]])
+                self._question_hashes = pd.concat([self._question_hashes, hashes.loc[new]])
+        
+        return self.result()
+    
+    def result(self) -> Dict[str, Any]:
+        """Summary in the same shape as ValidationUtils.validate_flashcard_set"""
+        total_cards = len(self._failures)
+        validation_result = {
+            'valid': True,
+            'total_cards': total_cards,
+            'valid_cards': 0,
+            'errors': [],
+            'warnings': [],
+            'invalid_ids': []
+        }
+        
+        if not total_cards:
+            validation_result['valid'] = False
+            validation_result['errors'].append("No flashcards provided")
+            return validation_result
+        
+        failures = self._failures.to_numpy(dtype=bool)
+        invalid_rows = failures.any(axis=1)
+        validation_result['valid_cards'] = int(total_cards - invalid_rows.sum())
+        validation_result['invalid_ids'] = list(self._failures.index[invalid_rows])
+        
+        # nonzero walks row by row, so errors come out in card order
+        rows, checks = np.nonzero(failures)
+        labels = self._failures.index if self._by_id else pd.RangeIndex(1, total_cards + 1)
+        validation_result['errors'] = [
+            f"Card {labels[row]}: {self.CHECKS[check]}"
+            for row, check in zip(rows[:self.max_errors], checks[:self.max_errors])
+        ]
+        if len(rows) > self.max_errors:
+            validation_result['warnings'].append(f"{len(rows) - self.max_errors} more errors not shown")
+        
+        if self._duplicate_hashes:
+            validation_result['warnings'].append(f"Found {len(self._duplicate_hashes)} duplicate questions")
+        
+        if validation_result['valid_cards'] == 0:
+            validation_result['valid'] = False
+        
+        return validation_result
+
 class FormatUtils:
     @staticmethod
     def format_question(text: str) -> str:
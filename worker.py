@@ -0,0 +1,209 @@
+import argparse
+import io
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Optional
+
+from deck_store import DeckStore
+from file_processor import FileProcessor, ContentCleaner
+from flashcard_generator import FlashcardGenerator
+from generation_profiles import DEFAULT_PROFILE
+from job_queue import JobQueue, WorkQueue
+
+
+class _Document(io.BytesIO):
+    """Queued document bytes in the shape FileProcessor expects of an upload"""
+
+    def __init__(self, data: bytes, file_type: str):
+        super().__init__(data)
+        self.type = file_type
+
+
+class Worker:
+    """Claims planning, chunk and finishing work from the job queue and runs it.
+
+    Workers keep no state between claims, so any number of them can run
+    against the same queue: on one host with the SQLite JobQueue, or across
+    machines with a broker-backed WorkQueue. Planning
+    extracts, cleans and chunks a document into tasks; each task generates
+    one card; the finishing step tops the cards up to the requested count
+    and writes the deck. Leases are renewed in the background while a step
+    runs, so slow steps are not handed to a second worker.
+    """
+
+    def __init__(self, generator: FlashcardGenerator, job_queue: WorkQueue, store: DeckStore,
+                 worker_id: Optional[str] = None, poll_interval_s: float = 1.0,
+                 file_processor: Optional[FileProcessor] = None):
+        self.generator = generator
+        self.job_queue = job_queue
+        self.store = store
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.poll_interval_s = poll_interval_s
+        self.file_processor = file_processor or FileProcessor()
+
+    def run_once(self) -> bool:
+        """Do one unit of work; False if there was nothing to do"""
+        job = self.job_queue.claim_job(self.worker_id)
+        if job is not None:
+            with self._renewing(self.job_queue.renew_job, job['id']):
+                if job['stage'] == "plan":
+                    self._plan(job)
+                else:
+                    self._finish(job)
+            return True
+
+        task = self.job_queue.claim_task(self.worker_id)
+        if task is not None:
+            with self._renewing(self.job_queue.renew_task, task['id']):
+                self._run_task(task)
+            return True
+        return False
+
+    @contextmanager
+    def _renewing(self, renew: Callable[[int, str], bool], item_id: int):
+        """Renew a lease every third of its length until the block exits"""
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.job_queue.lease_s / 3):
+                try:
+                    if not renew(item_id, self.worker_id):
+                        # Lost to another worker; its result will be rejected anyway
+                        return
+                except Exception as e:
+                    print(f"Warning: Worker {self.worker_id} could not renew its lease: {e}")
+
+        thread = threading.Thread(target=heartbeat, name=f"{self.worker_id}-lease", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def run(self, stop: Optional[threading.Event] = None, exit_when_idle: bool = False):
+        """Work until ``stop`` is set, or until the queue is empty with ``exit_when_idle``"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                worked = self.run_once()
+            except Exception as e:
+                # Claimed work is retried by another worker once its lease expires
+                print(f"Warning: Worker {self.worker_id} failed: {e}")
+                worked = False
+            if not worked:
+                if exit_when_idle:
+                    return
+                stop.wait(self.poll_interval_s)
+
+    def _plan(self, job: Dict[str, Any]):
+        params = job['params']
+        try:
+            pages = self.file_processor.iter_pages(_Document(job['document'], job['file_type']))
+            text = "".join(
+                f"\n--- Page {page_num} ---\n{page_text}\n" if page_num is not None else page_text
+                for page_num, page_text in pages
+            )
+        except Exception as e:
+            self.job_queue.fail_job(job['id'], self.worker_id, f"Error processing file: {e}")
+            return
+
+        content = ContentCleaner().clean(text)
+        if not content.strip():
+            self.job_queue.fail_job(job['id'], self.worker_id, "No text content could be extracted")
+            return
+
+        # One task per chunk, as many as cards were requested; shortfalls are topped up when finishing
+        chunks = self.generator.plan_chunks(content, params.get('language', "English"))
+        self.job_queue.plan_job(job['id'], self.worker_id, content, chunks[:params['num_cards']])
+
+    def _run_task(self, task: Dict[str, Any]):
+        params = task['params']
+        try:
+            card = self.generator.generate_card(
+                task['text'],
+                params['subject'],
+                params['difficulty'],
+                task['topic'],
+                params.get('language', "English"),
+                params.get('profile', DEFAULT_PROFILE),
+                params.get('mode', "auto")
+            )
+        except Exception as e:
+            self.job_queue.fail_task(task['id'], self.worker_id, str(e))
+            return
+        self.job_queue.complete_task(task['id'], self.worker_id, card)
+
+    def _finish(self, job: Dict[str, Any]):
+        params = job['params']
+        cards = self.generator.top_up(
+            self.job_queue.task_results(job['id']),
+            job['content'] or "",
+            params['subject'],
+            params['difficulty'],
+            params['num_cards'],
+            params.get('language', "English")
+        )
+
+        # Created and recorded together, so a crash leaves no deck the job does not know about
+        deck_id = self.job_queue.start_deck(job['id'], self.worker_id,
+                                            params.get('deck_name') or f"{params['subject']} - job {job['id']}")
+        if deck_id is None:
+            return
+        self.store.add_cards(deck_id, cards)
+        self.job_queue.finish_job(job['id'], self.worker_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flashcard generation worker")
+    parser.add_argument("--db", default=os.environ.get("FLASHCARD_DB_PATH", "flashcards.db"),
+                        help="SQLite database shared with the app")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="Concurrent tasks; their prompts share the model's micro-batches")
+    parser.add_argument("--lease-s", type=float, default=300.0, help="Seconds before unfinished work is retried")
+    parser.add_argument("--poll-interval-s", type=float, default=1.0)
+    parser.add_argument("--rules-only", action="store_true", help="Do not load a model")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Stop once the queue is empty")
+    args = parser.parse_args()
+
+    rss_watermark = os.environ.get("FLASHCARD_RSS_WATERMARK_MB")
+    generator = FlashcardGenerator(
+        max_batch_size=args.threads,
+        model_names=[] if args.rules_only else None,
+        idle_timeout_s=float(os.environ.get("FLASHCARD_MODEL_IDLE_TIMEOUT_S", 1800)),
+        rss_watermark_mb=float(rss_watermark) if rss_watermark else None,
+        artifact_dir=os.environ.get("FLASHCARD_ARTIFACT_DIR")
+    )
+    job_queue = JobQueue(args.db, lease_s=args.lease_s)
+    store = DeckStore(args.db)
+
+    stop = threading.Event()
+    workers = [
+        threading.Thread(
+            target=Worker(generator, job_queue, store, poll_interval_s=args.poll_interval_s).run,
+            args=(stop, args.exit_when_idle),
+            name=f"worker-{i}",
+            daemon=True
+        )
+        for i in range(max(1, args.threads))
+    ]
+    for thread in workers:
+        thread.start()
+
+    print(f"Worker started with {len(workers)} threads on {args.db}")
+    try:
+        while any(thread.is_alive() for thread in workers):
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in workers:
+            thread.join()
+    generator.lifecycle.shutdown()
+
+
+if __name__ == "__main__":
+    main()